@@ -0,0 +1 @@
+"""Performance benchmarks for marshmallow-peewee (run as `python -m benchmarks.<name>`)."""
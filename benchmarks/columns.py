@@ -0,0 +1,39 @@
+"""Columnar dumps (lists or arrays per field) against lists of row dicts."""
+
+from __future__ import annotations
+
+import tracemalloc
+from typing import Callable
+
+from .dump import ROWS, User, UserSchema, setup
+from .utils import measure, report
+
+
+def peak_memory(fn: Callable[[], object]) -> float:
+    """Return the peak of allocated memory (in MiB) while the result is built."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    setup()
+    schema = UserSchema()
+    cases: dict[str, Callable[[], object]] = {
+        "dump(many=True)": lambda: schema.dump(User.select(), many=True),
+        "dump_rows": lambda: schema.dump_rows(User.select()),
+        "dump_columns": lambda: schema.dump_columns(User.select()),
+        "dump_columns(arrays=True)": lambda: schema.dump_columns(
+            User.select(), arrays=True
+        ),
+    }
+    for name, fn in cases.items():
+        report(f"{name} x{ROWS}", measure(fn))
+        print(f"{name + ' peak memory':<50} {peak_memory(fn):12.3f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Construct a schema and dump an instance of a model with 30 fields."""
+
+from __future__ import annotations
+
+import datetime as dt
+
+import peewee as pw
+
+from marshmallow_peewee import ModelSchema
+
+from .utils import measure, report
+
+CALLS = 1_000
+FIELDS = 30
+
+attrs: dict[str, pw.Field] = {}
+for idx in range(FIELDS):
+    kind = idx % 3
+    if kind == 0:
+        attrs[f"name{idx}"] = pw.CharField(default="name")
+    elif kind == 1:
+        attrs[f"count{idx}"] = pw.IntegerField(default=idx)
+    else:
+        attrs[f"created{idx}"] = pw.DateTimeField(default=dt.datetime.now)
+
+Wide = type("Wide", (pw.Model,), attrs)
+
+
+class WideSchema(ModelSchema):
+    class Meta:
+        model = Wide
+
+
+class SharedWideSchema(ModelSchema):
+    class Meta:
+        model = Wide
+        shared_fields = True
+
+
+def construct_dump(schema_cls: type[ModelSchema], obj: pw.Model, calls: int = CALLS):
+    for _ in range(calls):
+        schema_cls(instance=obj).dump(obj)
+
+
+def main():
+    obj = Wide(id=1)
+    report(
+        f"construct + dump x{CALLS}",
+        measure(lambda: construct_dump(WideSchema, obj)),
+    )
+    report(
+        f"construct + dump x{CALLS} (shared fields)",
+        measure(lambda: construct_dump(SharedWideSchema, obj)),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Schema building time for a large models registry."""
+
+from __future__ import annotations
+
+import peewee as pw
+
+from marshmallow_peewee import DefaultConverter, ModelSchema
+
+from .utils import measure, report
+
+MODELS = 500
+
+
+class SlugField(pw.CharField):
+    pass
+
+
+class CounterField(pw.BigIntegerField):
+    pass
+
+
+class AmountField(pw.DecimalField):
+    pass
+
+
+class UncachedConverter(DefaultConverter):
+    """Resolve builders without the cache (the previous behaviour)."""
+
+    @classmethod
+    def get_builder(cls, field_cls):
+        cls.BUILDERS_CACHE.clear()
+        return super().get_builder(field_cls)
+
+
+def generate_models(count: int = MODELS) -> list[type[pw.Model]]:
+    models: list[type[pw.Model]] = []
+    for idx in range(count):
+        attrs = {
+            "name": pw.CharField(),
+            "slug": SlugField(unique=True),
+            "created": pw.DateTimeField(),
+            "counter": CounterField(default=0),
+            "amount": AmountField(null=True),
+            "active": pw.BooleanField(default=True),
+            "uid": pw.UUIDField(null=True),
+            "data": pw.BlobField(null=True),
+        }
+        if models:
+            attrs["parent"] = pw.ForeignKeyField(models[-1], null=True)
+        models.append(type(f"Model{idx}", (pw.Model,), attrs))
+    return models
+
+
+def build_schemas(models: list[type[pw.Model]], converter: type[DefaultConverter]):
+    for model in models:
+        meta = type("Meta", (), {"model": model, "model_converter": converter})
+        type("Schema", (ModelSchema,), {"Meta": meta})
+
+
+def main():
+    models = generate_models()
+    report(
+        f"build {MODELS} schemas (uncached lookup)",
+        measure(lambda: build_schemas(models, UncachedConverter)),
+    )
+    report(
+        f"build {MODELS} schemas (cached lookup)",
+        measure(lambda: build_schemas(models, DefaultConverter)),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Serialization of model instances and query rows."""
+
+from __future__ import annotations
+
+import datetime as dt
+
+import peewee as pw
+
+from marshmallow_peewee import ModelSchema
+
+from .utils import measure, report
+
+ROWS = 10_000
+
+database = pw.SqliteDatabase(":memory:")
+
+
+class Role(pw.Model):
+    name = pw.CharField()
+
+    class Meta:
+        database = database
+
+
+class User(pw.Model):
+    created = pw.DateTimeField(default=dt.datetime.now)
+    name = pw.CharField()
+    title = pw.CharField(null=True)
+    active = pw.BooleanField(default=True)
+    rating = pw.IntegerField(default=0)
+    score = pw.FloatField(default=0)
+    role = pw.ForeignKeyField(Role)
+
+    class Meta:
+        database = database
+
+
+class UserSchema(ModelSchema):
+    class Meta:
+        model = User
+
+
+class CompiledUserSchema(ModelSchema):
+    class Meta:
+        model = User
+        compiled_dump = True
+
+
+def setup(rows: int = ROWS):
+    database.create_tables([Role, User])
+    role = Role.create(name="user")
+    users = ({"name": f"user{idx}", "rating": idx, "role": role} for idx in range(rows))
+    with database.atomic():
+        for batch in pw.chunked(users, 10_000):
+            User.insert_many(batch).execute()
+
+
+def main():
+    setup()
+    schema, compiled = UserSchema(), CompiledUserSchema()
+    users = list(User.select())
+    report(f"dump {ROWS} instances", measure(lambda: schema.dump(users, many=True)))
+    report(
+        f"dump {ROWS} instances (compiled)",
+        measure(lambda: compiled.dump(users, many=True)),
+    )
+    report(
+        f"query + dump {ROWS} rows",
+        measure(lambda: schema.dump(User.select(), many=True)),
+    )
+    report(
+        f"query + dump {ROWS} rows (compiled)",
+        measure(lambda: compiled.dump(User.select(), many=True)),
+    )
+    report(
+        f"query + dump_rows {ROWS} rows (tuples)",
+        measure(lambda: schema.dump_rows(User.select())),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Serialization of model instances and query rows into JSON."""
+
+from __future__ import annotations
+
+import io
+import json
+
+from marshmallow_peewee import ModelSchema
+
+from .dump import ROWS, User, setup
+from .utils import measure, report
+
+
+class UserSchema(ModelSchema):
+    class Meta:
+        model = User
+
+
+def main():
+    setup()
+    schema = UserSchema()
+    users = list(User.select())
+    report(
+        f"json.dumps(dump()) {ROWS} instances",
+        measure(lambda: json.dumps(schema.dump(users, many=True)).encode()),
+    )
+    for backend in ("json", "orjson"):
+        report(
+            f"dump_json {ROWS} instances ({backend})",
+            measure(lambda: schema.dump_json(users, many=True, backend=backend)),
+        )
+
+    report(
+        f"query + json.dumps(dump()) {ROWS} rows",
+        measure(lambda: json.dumps(schema.dump(User.select(), many=True)).encode()),
+    )
+    for backend in ("json", "orjson"):
+        report(
+            f"query + dump_json {ROWS} rows ({backend})",
+            measure(lambda: schema.dump_json(User.select(), backend=backend)),
+        )
+        report(
+            f"query + dump_jsonl {ROWS} rows ({backend})",
+            measure(
+                lambda: schema.dump_jsonl(User.select(), io.BytesIO(), backend=backend)
+            ),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Load time depending on `Meta.db_validate`."""
+
+from __future__ import annotations
+
+import datetime as dt
+
+import peewee as pw
+
+from marshmallow_peewee import ModelSchema
+
+from .utils import measure, report
+
+ROWS = 10_000
+
+
+class Role(pw.Model):
+    name = pw.CharField()
+
+
+class User(pw.Model):
+    created = pw.DateTimeField(default=dt.datetime.now)
+    name = pw.CharField()
+    title = pw.CharField(null=True)
+    active = pw.BooleanField(default=True)
+    rating = pw.IntegerField(default=0)
+    score = pw.FloatField(default=0)
+    role = pw.ForeignKeyField(Role)
+
+
+def generate_rows(count: int = ROWS) -> list[dict]:
+    created = dt.datetime(2024, 1, 1).isoformat()
+    return [
+        {
+            "created": created,
+            "name": f"user{idx}",
+            "title": None,
+            "active": bool(idx % 2),
+            "rating": idx,
+            "score": idx / 3,
+            "role": idx % 10 + 1,
+        }
+        for idx in range(count)
+    ]
+
+
+def get_schema(db_validate: str) -> ModelSchema:
+    meta = type("Meta", (), {"model": User, "db_validate": db_validate})
+    return type("UserSchema", (ModelSchema,), {"Meta": meta})()
+
+
+def main():
+    rows = generate_rows()
+    for db_validate in ("always", "untyped", "never"):
+        schema = get_schema(db_validate)
+        report(
+            f"load {ROWS} rows (db_validate={db_validate})",
+            measure(lambda: schema.load(rows, many=True), repeat=10),  # noqa: B023
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Serialization of nested foreign keys with a skewed distribution."""
+
+from __future__ import annotations
+
+import json
+import random
+
+import peewee as pw
+
+from marshmallow_peewee import FKNested, ModelSchema
+
+from .utils import measure, report
+
+ROWS = 10_000
+CUSTOMERS = 100
+
+database = pw.SqliteDatabase(":memory:")
+
+
+class Customer(pw.Model):
+    name = pw.CharField()
+    email = pw.CharField()
+    rating = pw.IntegerField(default=0)
+
+    class Meta:
+        database = database
+
+
+class Order(pw.Model):
+    customer = pw.ForeignKeyField(Customer)
+    total = pw.IntegerField()
+
+    class Meta:
+        database = database
+
+
+def get_schema(memoize) -> ModelSchema:
+    return type(
+        "OrderSchema",
+        (ModelSchema,),
+        {
+            "customer": FKNested(Customer, memoize=memoize),
+            "Meta": type("Meta", (), {"model": Order}),
+        },
+    )()
+
+
+def setup(rows: int = ROWS):
+    database.create_tables([Customer, Order])
+    with database.atomic():
+        Customer.insert_many(
+            [
+                {"name": f"customer{idx}", "email": f"customer{idx}@example.com"}
+                for idx in range(CUSTOMERS)
+            ]
+        ).execute()
+
+        # Most of the orders refer a few customers
+        rnd = random.Random(42)  # noqa: S311
+        weights = [1 / (idx + 1) ** 2 for idx in range(CUSTOMERS)]
+        customers = rnd.choices(range(1, CUSTOMERS + 1), weights, k=rows)
+        Order.insert_many(
+            [
+                {"customer": customer, "total": idx}
+                for idx, customer in enumerate(customers)
+            ]
+        ).execute()
+
+
+def main():
+    setup()
+    orders = list(Order.select(Order, Customer).join(Customer))
+    for memoize in (False, "shared", "copy"):
+        schema = get_schema(memoize)
+        report(
+            f"dump {ROWS} orders (memoize={memoize})",
+            measure(lambda: schema.dump(orders, many=True)),
+        )
+
+    schema = get_schema(False)
+    report(
+        f"dump_normalized {ROWS} orders",
+        measure(lambda: schema.dump_normalized(orders, many=True)),
+    )
+    inline = len(json.dumps(schema.dump(orders, many=True)))
+    normalized = len(json.dumps(schema.dump_normalized(orders, many=True)))
+    print(f"JSON size: inline {inline} bytes, normalized {normalized} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Import time of schemas with auto-generated nested schemas."""
+
+from __future__ import annotations
+
+import peewee as pw
+
+from marshmallow_peewee import FKNested, ModelSchema, Related
+
+from .utils import measure, report
+
+SCHEMAS = 500
+
+
+class Role(pw.Model):
+    name = pw.CharField()
+    title = pw.CharField(null=True)
+
+
+class User(pw.Model):
+    name = pw.CharField()
+    role = pw.ForeignKeyField(Role, backref="users")
+
+
+def build_schemas(count: int = SCHEMAS, *, cached: bool = True):
+    for _ in range(count):
+        if not cached:
+            ModelSchema.SCHEMAS_CACHE.clear()
+
+        type(
+            "UserSchema",
+            (ModelSchema,),
+            {
+                "role": Related(meta={"fields": ("id", "name")}),
+                "user_role": FKNested(Role, only=("name",), attribute="role"),
+                "Meta": type("Meta", (), {"model": User}),
+            },
+        )
+        type(
+            "RoleSchema",
+            (ModelSchema,),
+            {"users": Related(), "Meta": type("Meta", (), {"model": Role})},
+        )
+
+
+def main():
+    report(
+        f"build {SCHEMAS} schemas (uncached nested)",
+        measure(lambda: build_schemas(cached=False)),
+    )
+    report(
+        f"build {SCHEMAS} schemas (cached nested)",
+        measure(lambda: build_schemas(cached=True)),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Scaling of `ModelSchema.load_parallel` across processes."""
+
+from __future__ import annotations
+
+import os
+
+from marshmallow_peewee import ModelSchema
+
+from .load import User, generate_rows
+from .utils import measure, report
+
+ROWS = 100_000
+
+
+class UserSchema(ModelSchema):
+    class Meta:
+        model = User
+
+
+def main():
+    rows = generate_rows(ROWS)
+    schema = UserSchema()
+    report(
+        f"load {ROWS} rows (load many)",
+        measure(lambda: schema.load(rows, many=True), repeat=3),
+    )
+
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        report(
+            f"load {ROWS} rows (load_parallel, {workers} workers)",
+            measure(
+                lambda: schema.load_parallel(rows, workers=workers),  # noqa: B023
+                repeat=3,
+            ),
+        )
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Handle requests with a shared schema or with a schema per request."""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable
+
+from .dump import User, UserSchema
+from .utils import measure, report
+
+REQUESTS = 2_000
+THREADS = 8
+
+# A module-level schema shared by all threads
+SHARED = UserSchema(partial=True)
+
+
+def handle_shared(user: User):
+    SHARED.load({"name": "Bob", "rating": 5}, instance=user)
+    return SHARED.dump(user)
+
+
+def handle_per_request(user: User):
+    schema = UserSchema(partial=True)
+    schema.load({"name": "Bob", "rating": 5}, instance=user)
+    return schema.dump(user)
+
+
+def run(executor: ThreadPoolExecutor, handle: Callable, users: list[User]):
+    return list(executor.map(handle, users))
+
+
+def main():
+    users = [User(id=idx, name="Mike", role=1) for idx in range(REQUESTS)]
+    with ThreadPoolExecutor(THREADS) as executor:
+        for name, handle in (
+            ("per-request schemas", handle_per_request),
+            ("shared schema", handle_shared),
+        ):
+            report(
+                f"load + dump x{REQUESTS} ({name}, {THREADS} threads)",
+                measure(partial(run, executor, handle, users)),
+            )
+
+
+if __name__ == "__main__":
+    main()
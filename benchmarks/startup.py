@@ -0,0 +1,87 @@
+"""Import time of a module with many schemas (eager and lazy field conversion)."""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from .utils import report
+
+SCHEMAS = 800
+USED = 5
+REPEAT = 3
+
+ROOT = Path(__file__).parent.parent
+
+MODEL = """
+class Model{idx}(pw.Model):
+    name = pw.CharField(max_length=255)
+    slug = pw.CharField(unique=True)
+    created = pw.DateTimeField()
+    counter = pw.BigIntegerField(default=0)
+    amount = pw.DecimalField(null=True)
+    active = pw.BooleanField(default=True)
+    uid = pw.UUIDField(null=True)
+    parent = pw.ForeignKeyField({parent}, null=True)
+
+
+class Model{idx}Schema(ModelSchema):
+    class Meta:
+        model = Model{idx}
+"""
+
+# Import the module and instantiate a few schemas, print both times
+SCRIPT = """
+import time
+from marshmallow_peewee import setup
+
+setup(lazy_schemas={lazy})
+start = time.perf_counter()
+import schemas
+imported = time.perf_counter()
+for idx in range({used}):
+    getattr(schemas, f"Model{{idx}}Schema")()
+print(imported - start, time.perf_counter() - imported)
+"""
+
+
+def generate_module(path: Path, count: int = SCHEMAS):
+    lines = ["import peewee as pw", "from marshmallow_peewee import ModelSchema", ""]
+    lines += [
+        MODEL.format(idx=idx, parent=f"Model{idx - 1}" if idx else "'self'")
+        for idx in range(count)
+    ]
+    path.write_text("\n".join(lines))
+
+
+def run(root: Path, lazy: bool) -> tuple[float, float]:
+    """Return the best import and first use times in seconds."""
+    script = SCRIPT.format(lazy=lazy, used=USED)
+    results = []
+    for _ in range(REPEAT):
+        output = subprocess.check_output(
+            [sys.executable, "-c", script],
+            cwd=root,
+            env={"PYTHONPATH": f"{root}:{ROOT}", "PYTHONDONTWRITEBYTECODE": "1"},
+            text=True,
+        )
+        imported, used = output.split()
+        results.append((float(imported), float(used)))
+    return min(results)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        generate_module(root / "schemas.py")
+        for lazy in (False, True):
+            imported, used = run(root, lazy)
+            mode = "lazy" if lazy else "eager"
+            report(f"import {SCHEMAS} schemas ({mode})", imported)
+            report(f"instantiate {USED} schemas ({mode})", used)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""Benchmark suite for the hot paths (schema building, dump, load, nesting).
+
+Run `python -m benchmarks.suite --output results.json` to save the results and
+`python -m benchmarks.suite --baseline results.json` to compare with them, the
+command exits with 1 when any case is slower than the baseline by more than the
+threshold.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+from importlib.metadata import version
+from typing import Callable, Optional
+
+import peewee as pw
+
+from marshmallow_peewee import FKNested, ModelSchema, Related
+
+from . import convert, dump, load
+from .utils import measure, report
+
+SIZES = {"1": 1, "1k": 1_000, "100k": 100_000}
+
+# Max relative slowdown which is not a regression
+THRESHOLD = 0.2
+
+TCase = Callable[[], Callable[[], object]]
+
+CASES: dict[str, TCase] = {}
+
+
+def case(name: str) -> Callable[[TCase], TCase]:
+    """Register a case, the function prepares data and returns a measured callable."""
+
+    def wrapper(fn: TCase) -> TCase:
+        CASES[name] = fn
+        return fn
+
+    return wrapper
+
+
+def build_schema(model: type[pw.Model], **options) -> type[ModelSchema]:
+    meta = type("Meta", (), {"model": model, **options})
+    return type(f"{model.__name__}Schema", (ModelSchema,), {"Meta": meta})
+
+
+@case("convert/many-models")
+def convert_many() -> Callable[[], object]:
+    models = convert.generate_models(200)
+    return lambda: [build_schema(model) for model in models]
+
+
+@case("convert/wide-model")
+def convert_wide() -> Callable[[], object]:
+    attrs: dict[str, pw.Field] = {}
+    for idx in range(200):
+        attrs[f"name{idx}"] = pw.CharField(null=True)
+        attrs[f"count{idx}"] = pw.IntegerField(default=0)
+    model = type("WideModel", (pw.Model,), attrs)
+    return lambda: build_schema(model)
+
+
+def dump_case(size: int) -> TCase:
+    def prepare() -> Callable[[], object]:
+        schema = build_schema(dump.User)()
+        users = list(dump.User.select().limit(size))
+        return lambda: schema.dump(users, many=True)
+
+    return prepare
+
+
+def load_case(size: int) -> TCase:
+    def prepare() -> Callable[[], object]:
+        schema = build_schema(load.User)()
+        rows = load.generate_rows(size)
+        return lambda: schema.load(rows, many=True)
+
+    return prepare
+
+
+for label, size in SIZES.items():
+    case(f"dump/{label}")(dump_case(size))
+    case(f"load/{label}")(load_case(size))
+
+
+@case("nested/fknested-1k")
+def nested_fknested() -> Callable[[], object]:
+    schema_cls = type(
+        "UserSchema",
+        (ModelSchema,),
+        {
+            "role": FKNested(dump.Role),
+            "Meta": type("Meta", (), {"model": dump.User}),
+        },
+    )
+    schema = schema_cls()
+    users = list(dump.User.select(dump.User, dump.Role).join(dump.Role).limit(1000))
+    return lambda: schema.dump(users, many=True)
+
+
+@case("nested/related-fk-1k")
+def nested_related() -> Callable[[], object]:
+    schema_cls = type(
+        "UserSchema",
+        (ModelSchema,),
+        {"role": Related(), "Meta": type("Meta", (), {"model": dump.User})},
+    )
+    schema = schema_cls()
+    users = list(dump.User.select(dump.User, dump.Role).join(dump.Role).limit(1000))
+    return lambda: schema.dump(users, many=True)
+
+
+@case("nested/related-backref-1k")
+def nested_backref() -> Callable[[], object]:
+    schema_cls = type(
+        "RoleSchema",
+        (ModelSchema,),
+        {
+            "user_set": Related(),
+            "Meta": type("Meta", (), {"model": dump.Role}),
+        },
+    )
+    schema = schema_cls()
+    with dump.database.atomic():
+        roles = [dump.Role.create(name=f"role{idx}") for idx in range(100)]
+        dump.User.insert_many(
+            [
+                {"name": f"user{idx}", "role": role}
+                for role in roles
+                for idx in range(10)
+            ]
+        ).execute()
+
+    query = dump.Role.select().where(dump.Role.id.in_([role.id for role in roles]))
+    return lambda: schema.dump(query, many=True)
+
+
+def fk_case(string_keys: bool) -> TCase:
+    def prepare() -> Callable[[], object]:
+        schema = build_schema(
+            dump.User, fields=("id", "role"), string_keys=string_keys
+        )()
+        users = list(dump.User.select().limit(1000))
+        return lambda: schema.dump(users, many=True)
+
+    return prepare
+
+
+case("foreign-key/string-keys-1k")(fk_case(True))
+case("foreign-key/int-keys-1k")(fk_case(False))
+
+
+def run(names: list[str], repeat: int = 5) -> dict[str, float]:
+    """Run the cases, return the best times in seconds."""
+    dump.setup(max(SIZES.values()))
+    results: dict[str, float] = {}
+    for name in names:
+        fn = CASES[name]()
+        results[name] = measure(fn, repeat=repeat)
+        report(name, results[name])
+
+    return results
+
+
+def compare(
+    results: dict[str, float], baseline: dict[str, float], threshold: float = THRESHOLD
+) -> list[str]:
+    """Compare the results with the baseline, return names of regressed cases."""
+    regressions = []
+    for name, seconds in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+
+        ratio = seconds / base
+        mark = ""
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            mark = "  REGRESSION"
+        print(f"{name:<50} {ratio:8.2f}x{mark}")
+
+    return regressions
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-o", "--output", help="save the results to the JSON file")
+    parser.add_argument("-b", "--baseline", help="compare with the saved results")
+    parser.add_argument("-t", "--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("-k", "--filter", default="", help="run matching cases only")
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    names = [name for name in CASES if args.filter in name]
+    results = run(names, repeat=args.repeat)
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "peewee": version("peewee"),
+                    "marshmallow": version("marshmallow"),
+                    "results": results,
+                },
+                fp,
+                indent=2,
+            )
+
+    if args.baseline:
+        with open(args.baseline) as fp:
+            baseline = json.load(fp)["results"]
+
+        print(f"\nCompared with {args.baseline} (threshold {args.threshold:.0%}):")
+        if compare(results, baseline, args.threshold):
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
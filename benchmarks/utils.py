@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+import timeit
+from typing import Callable
+
+
+def measure(fn: Callable[[], object], *, number: int = 1, repeat: int = 5) -> float:
+    """Return the best time of a single call in seconds."""
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+
+
+def report(name: str, seconds: float):
+    print(f"{name:<50} {seconds * 1000:12.3f} ms")
@@ -3,6 +3,7 @@ from __future__ import annotations
 from .config import setup
 from .convert import DefaultConverter
 from .fields import FKNested, ForeignKey, Related
+from .profiling import profile
 from .schema import ModelSchema
 
 __all__ = (
@@ -11,5 +12,6 @@ __all__ = (
     "ForeignKey",
     "ModelSchema",
     "Related",
+    "profile",
     "setup",
 )
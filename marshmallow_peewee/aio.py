@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Executor
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Iterable,
+    Optional,
+    Union,
+)
+
+import peewee as pw
+
+
+async def achunked(
+    rows: Union[AsyncIterable[Any], Iterable[Any]], size: int
+) -> AsyncIterator[list[Any]]:
+    """Split sync or async iterables into lists of the given size."""
+    if not isinstance(rows, AsyncIterable):
+        for batch in pw.chunked(rows, size):
+            yield batch
+        return
+
+    chunk: list[Any] = []
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+async def run_chunk(executor: Optional[Executor], fn: Callable, *args) -> Any:
+    """Run the function in the executor or in the loop giving control back after."""
+    if executor is not None:
+        return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+
+    result = fn(*args)
+    await asyncio.sleep(0)
+    return result
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Mapping, Optional
+
+import peewee as pw
+from marshmallow import ValidationError
+
+from .state import scope
+
+if TYPE_CHECKING:
+    import marshmallow as ma
+
+
+@dataclass
+class BulkResult:
+    """Result of a bulk operation."""
+
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+    # Validation errors by indexes of the source rows
+    errors: dict[int, Any] = field(default_factory=dict)
+
+
+def get_value(data: Mapping[str, Any], key: str, field: pw.Field) -> Any:
+    """Get the loaded value or the model field default."""
+    if key in data:
+        return data[key]
+
+    default = field.default
+    return default() if callable(default) else default
+
+
+def iter_loaded(
+    schema: ma.Schema,
+    rows: Iterable[Mapping[str, Any]],
+    batch_size: int,
+    errors: dict[int, Any],
+    *,
+    with_rows: bool = False,
+    **kwargs,
+) -> Iterator[list[Any]]:
+    """Validate the rows by batches, skip invalid rows and collect their errors.
+
+    Yields lists of the deserialized data (`post_load` hooks are not called) or of
+    `(row, data)` pairs with `with_rows=True`.
+    """
+    offset = 0
+    for batch in pw.chunked(rows, batch_size):
+        try:
+            with scope():
+                result = schema._do_load(batch, many=True, postprocess=False, **kwargs)
+            messages: dict = {}
+        except ValidationError as exc:
+            result = exc.valid_data or []
+            messages = exc.messages if isinstance(exc.messages, dict) else {}
+            # Errors which are not bound to rows (e.g. from `validates_schema`)
+            common = {k: v for k, v in messages.items() if not isinstance(k, int)}
+            for idx in range(len(batch)):
+                if idx not in messages and common:
+                    messages[idx] = common
+
+        valid = []
+        for idx, data in enumerate(result):
+            if idx in messages:
+                errors[offset + idx] = messages[idx]
+            else:
+                valid.append((batch[idx], data) if with_rows else data)
+
+        offset += len(batch)
+        yield valid
+
+
+def get_schema_path(schema_cls: type) -> str:
+    """Get an importable path of the given schema class."""
+    qualname = schema_cls.__qualname__
+    if "<locals>" in qualname:
+        raise ValueError(f"Schema class should be importable: {qualname}")
+    return f"{schema_cls.__module__}:{qualname}"
+
+
+def import_schema(path: str) -> type[ma.Schema]:
+    module, _, qualname = path.partition(":")
+    obj: Any = import_module(module)
+    for name in qualname.split("."):
+        obj = getattr(obj, name)
+    return obj
+
+
+def load_chunk(
+    path: str,
+    options: dict[str, Any],
+    chunk: list[Mapping[str, Any]],
+    as_dicts: bool,
+    kwargs: dict[str, Any],
+) -> tuple[list[Any], Optional[dict[int, Any]]]:
+    """Load the chunk with a schema rebuilt by its path (runs inside workers)."""
+    return load_schema_chunk(import_schema(path)(**options), chunk, as_dicts, kwargs)
+
+
+def load_schema_chunk(
+    schema: ma.Schema,
+    chunk: list[Mapping[str, Any]],
+    as_dicts: bool,
+    kwargs: dict[str, Any],
+) -> tuple[list[Any], Optional[dict[int, Any]]]:
+    """Load the chunk, return the valid data and the errors."""
+    try:
+        if as_dicts:
+            return schema._do_load(chunk, many=True, postprocess=False, **kwargs), None
+        return schema.load(chunk, many=True, **kwargs), None
+
+    except ValidationError as exc:
+        return exc.valid_data or [], exc.messages  # type: ignore[return-value]
+
+
+def dump_chunk(
+    path: str, options: dict[str, Any], chunk: list[Any], columns: Optional[tuple]
+) -> list[Any]:
+    """Dump the chunk with a schema rebuilt by its path (runs inside workers)."""
+    schema: Any = import_schema(path)(**options)
+    return schema.dump_chunk(chunk, columns)
+
+
+def merge_chunks(
+    results: Iterable[tuple[list[Any], Optional[dict[int, Any]]]], chunk_size: int
+) -> tuple[list[Any], dict[Any, Any]]:
+    """Merge loaded chunks, shift the errors indexes by the chunks offsets."""
+    loaded: list[Any] = []
+    errors: dict[Any, Any] = {}
+    for num, (data, messages) in enumerate(results):
+        if messages:
+            offset = num * chunk_size
+            errors.update(
+                (offset + idx if isinstance(idx, int) else idx, msgs)
+                for idx, msgs in messages.items()
+            )
+        loaded.extend(data)
+
+    return loaded, errors
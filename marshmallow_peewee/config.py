@@ -1,11 +1,19 @@
 from __future__ import annotations
 
-from typing import Final
+from typing import Any, Final
 
-DEFAULTS: Final = {
+DEFAULTS: Final[dict[str, Any]] = {
     "dump_only_pk": True,
     "string_keys": True,
     "id_keys": False,
+    "compiled_dump": False,
+    "shared_fields": False,
+    "validate_fk": False,
+    "validate_fk_ttl": None,
+    "db_validate": "always",
+    "lazy_loads": None,
+    "lazy_schemas": False,
+    "json_backend": None,
 }
 
 
@@ -22,6 +22,7 @@ class ModelConverterMeta(type):
     def __new__(cls, name, bases, attrs):
         kls = super().__new__(cls, name, bases, attrs)
         kls.TYPE_MAPPING = list(kls.TYPE_MAPPING)  # type: ignore[attr-defined]
+        kls.BUILDERS_CACHE = {}  # type: ignore[attr-defined]
         return kls
 
 
@@ -30,6 +31,9 @@ class DefaultConverter(metaclass=ModelConverterMeta):
 
     TYPE_MAPPING: TFieldMappingList = []
 
+    # Resolved builders by peewee field classes
+    BUILDERS_CACHE: dict[type[pw.Field], Callable[..., fields.Field]] = {}
+
     def __init__(self, opts: SchemaOpts):
         self.opts = opts
 
@@ -70,6 +74,7 @@ class DefaultConverter(metaclass=ModelConverterMeta):
 
             def wrapper(fn):
                 cls.TYPE_MAPPING.insert(0, (field, fn))
+                cls.BUILDERS_CACHE.clear()
                 return fn
 
             return wrapper
@@ -79,12 +84,37 @@ class DefaultConverter(metaclass=ModelConverterMeta):
 
         return None
 
+    @classmethod
+    def get_builder(cls, field_cls: type[pw.Field]) -> Callable[..., fields.Field]:
+        """Find a builder for the given peewee field class."""
+        try:
+            return cls.BUILDERS_CACHE[field_cls]
+        except KeyError:
+            pass
+
+        # use first "known" field class from field class mro
+        # so that extended field classes get converted correctly
+        builder = DEFAULT_BUILDER
+        mapping = dict(reversed(cls.TYPE_MAPPING))
+        for kls in field_cls.__mro__:
+            if kls in mapping:
+                builder = mapping[kls]
+                break
+
+        cls.BUILDERS_CACHE[field_cls] = builder
+        return builder
+
     def convert(self, field: pw.Field, data_key: Optional[str] = None) -> fields.Field:
+        db_validate = self.opts.db_validate
         params = {
             "data_key": data_key or field.name,
             "allow_none": field.null,
             "required": not field.null and field.default is None,
-            "validate": [convert_value_validate(field.db_value)],
+            "validate": (
+                [convert_value_validate(field.db_value)]
+                if db_validate == "always"
+                else []
+            ),
         }
 
         if field.null:
@@ -105,14 +135,26 @@ class DefaultConverter(metaclass=ModelConverterMeta):
         if field.help_text:
             params["metadata"]["description"] = field.help_text
 
-        # use first "known" field class from field class mro
-        # so that extended field classes get converted correctly
-        for cls in field.__class__.__mro__:
-            for pw_field, builder in self.TYPE_MAPPING:
-                if cls is pw_field:
-                    return builder(field, self.opts, **params)
+        builder = self.get_builder(field.__class__)
+        ma_field = builder(field, self.opts, **params)
+        if db_validate == "untyped" and self.is_untyped(field, ma_field):
+            ma_field.validators.insert(0, convert_value_validate(field.db_value))
+
+        return ma_field
+
+    @staticmethod
+    def is_untyped(field: pw.Field, ma_field: fields.Field) -> bool:
+        """Check that values loaded by the given field may be not acceptable for DB."""
+        if isinstance(ma_field, fields.Raw):
+            return True
+
+        # Custom peewee fields may convert values in any way
+        for name in ("db_value", "adapt"):
+            owner = next(kls for kls in type(field).__mro__ if name in kls.__dict__)
+            if owner.__module__ != pw.__name__:
+                return True
 
-        return DEFAULT_BUILDER(field, self.opts, **params)
+        return False
 
 
 def generate_builder(ma_field_cls: type[fields.Field]) -> Callable:
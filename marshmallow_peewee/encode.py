@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import datetime as dt
+import json
+from decimal import Decimal
+from typing import Any, Callable, NamedTuple, Optional
+from uuid import UUID
+
+from .config import DEFAULTS
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+
+class Backend(NamedTuple):
+    """JSON encoder."""
+
+    # Encode an object into UTF-8 bytes
+    dumps: Callable[[Any], bytes]
+
+    # Encoder formats datetimes and UUIDs as marshmallow does (ISO/hex strings), so
+    # the values may be passed to the encoder unformatted
+    native: bool
+
+
+def default(value: Any) -> Any:
+    """Encode values which are not supported by the backends."""
+    if isinstance(value, Decimal):
+        return str(value)
+
+    if isinstance(value, (dt.datetime, dt.date, dt.time)):
+        return value.isoformat()
+
+    if isinstance(value, UUID):
+        return str(value)
+
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+_encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False, default=default)
+
+
+def dumps_json(value: Any) -> bytes:
+    return _encoder.encode(value).encode()
+
+
+def dumps_orjson(value: Any) -> bytes:
+    # Non-string keys are converted to strings as the stdlib encoder does
+    return orjson.dumps(value, default=default, option=orjson.OPT_NON_STR_KEYS)
+
+
+BACKENDS: dict[str, Backend] = {"json": Backend(dumps_json, native=False)}
+if orjson is not None:
+    BACKENDS["orjson"] = Backend(dumps_orjson, native=True)
+
+
+def get_backend(name: Optional[str] = None) -> Backend:
+    """Get a JSON backend by name, by default orjson is used when it's installed."""
+    name = name or DEFAULTS["json_backend"]
+    if name is None:
+        return BACKENDS.get("orjson") or BACKENDS["json"]
+
+    backend = BACKENDS.get(name)
+    if backend is None:
+        raise ValueError(f"Unsupported JSON backend: {name}")
+    return backend
@@ -1,20 +1,40 @@
 from __future__ import annotations
 
-from typing import Any, Optional, Union
+from collections.abc import Sequence
+from typing import Any, Literal, Optional, Union
 
 import peewee as pw
-from marshmallow import Schema, fields
+from marshmallow import Schema, fields, missing
+
+from .state import get_state
+
+# Max number of keys in one `IN (...)` query (the default SQLite variables limit)
+IN_BATCH_SIZE = 999
 
 
 class Related(fields.Nested):
+    """Nested related instances.
+
+    Backrefs are loaded with one query per relation (per `IN_BATCH_SIZE` parents)
+    when a list of instances is dumped (`prefetch=False` disables it), `limit`
+    caps the number of the serialized related instances per instance. Prefetched
+    backrefs are fetched fully, `limit` caps the output only there.
+    """
+
     def __init__(
         self,
         nested: Optional[type[Schema]] = None,
         meta: Optional[dict[str, Any]] = None,
+        *,
+        limit: Optional[int] = None,
+        prefetch: bool = True,
         **kwargs,
     ):
         self.field = None
+        self.key_name: Optional[str] = None
         self.meta = meta or {}
+        self.limit = limit
+        self.prefetch = prefetch
         super(Related, self).__init__(nested, **kwargs)  # type: ignore[arg-type]
 
     def init_model(self, model: pw.Model, name: str):
@@ -30,25 +50,171 @@ class Related(fields.Nested):
 
         self.field = field
         self.attribute = self.attribute or name
-        self.meta["model"] = rel_model
-        meta = type("Meta", (), self.meta)
-        self.nested = type("Schema", (ModelSchema,), {"Meta": meta})
+        self.nested = ModelSchema.for_model(rel_model, **self.meta)
+
+    def get_backref(self) -> Optional[pw.ForeignKeyField]:
+        """Get a foreign key of the related model when the field is a backref."""
+        model = getattr(getattr(self.parent, "opts", None), "model", None)
+        name = self.attribute or self.name
+        accessor = getattr(model, name, None) if model and name else None
+        if isinstance(accessor, pw.BackrefAccessor):
+            return accessor.field
+        return None
+
+    def get_foreign_key(self) -> Optional[pw.ForeignKeyField]:
+        """Get a foreign key of the parent schema model when the field isn't a backref."""
+        field = self.field
+        return (
+            field if isinstance(field, pw.ForeignKeyField) and not self.many else None
+        )
+
+    def prefetch_related(self, objs: list[pw.Model]):
+        """Load backref instances for the given list with a query per batch of keys."""
+        state = get_state()
+        fk = self.get_backref()
+        if state is None or fk is None:
+            return
+
+        parents = {
+            obj.__data__.get(fk.rel_field.name): obj
+            for obj in objs
+            if isinstance(obj, pw.Model)
+        }
+        parents.pop(None, None)
+
+        groups: dict[Any, list[pw.Model]] = {}
+        if parents:
+            from .schema import ModelSchema
+
+            rel_model = fk.model
+            query = rel_model.select()
+            schema = self.schema
+            if isinstance(schema, ModelSchema) and schema.opts.model is rel_model:
+                query = schema.select(query)
+                if not any(
+                    node.name == fk.name
+                    for node in query._returning
+                    if isinstance(node, pw.Field) and node.model is rel_model
+                ):
+                    query = query.select_extend(fk)
+
+            for batch in pw.chunked(parents, IN_BATCH_SIZE):
+                for rel_obj in query.where(fk.in_(batch)):
+                    key = rel_obj.__data__.get(fk.name)
+                    group = groups.setdefault(key, [])
+                    if self.limit is None or len(group) < self.limit:
+                        rel_obj.__rel__[fk.name] = parents[key]
+                        group.append(rel_obj)
+
+        prefetched = state.get("prefetched")
+        if prefetched is None:
+            prefetched = state["prefetched"] = {}
+        prefetched[self] = (fk.rel_field.name, groups)
+
+    def get_value(self, obj, attr, accessor=None, default=missing):
+        state = get_state()
+        prefetched = state and (state.get("prefetched") or {}).get(self)
+        if prefetched:
+            name, groups = prefetched
+            return groups.get(obj.__data__.get(name), [])
+
+        value = super(Related, self).get_value(obj, attr, accessor, default)
+        if self.limit is not None and isinstance(value, pw.SelectQuery):
+            return value.limit(self.limit)
+
+        return value
+
+    def _serialize(self, value, attr, obj, **kwargs):  # type: ignore[override]
+        state = get_state()
+        included = state.get("included") if state is not None else None
+        if included is None or value is None:
+            return super(Related, self)._serialize(value, attr, obj, **kwargs)
+
+        if self.many:
+            return [include(self, included, item) for item in value]
+
+        return include(self, included, value)
 
     def _deserialize(self, value, attr, data, partial=None, **_):
         if self.field is None:
             raise RuntimeError("Init model first.")
 
+        rel_field = self.field.rel_field
+        state = get_state()
+        if self.many or state is None:
+            if not isinstance(value, dict):
+                return rel_field.python_value(value)
+            return super(Related, self)._deserialize(value, attr, data, partial=partial)
+
+        # Nested instances are shared by (model, key) inside a load call
+        identity = state.setdefault("identity", {})
         if not isinstance(value, dict):
-            return self.field.rel_field.python_value(value)
+            key = rel_field.python_value(value)
+            cached = identity.get((rel_field.model, rel_field.name, key))
+            if cached is not None:
+                obj = cached[1]
+                if rel_field.python_value(obj.__data__.get(rel_field.name)) == key:
+                    return obj
+            return key
+
+        raw = value.get(self.get_key_name())
+        ident = (
+            None
+            if raw is None
+            else (rel_field.model, rel_field.name, rel_field.python_value(raw))
+        )
+        cached = identity.get(ident) if ident else None
+        if cached is not None and cached[0] == value:
+            return cached[1]
+
+        obj = super(Related, self)._deserialize(value, attr, data, partial=partial)
+        if ident and isinstance(obj, pw.Model):
+            identity.setdefault(ident, (value, obj))
+        return obj
+
+    def get_key_name(self) -> str:
+        """Get a data key of the related field in the nested data."""
+        if self.key_name is None:
+            name = self.key_name = self.field.rel_field.name  # type: ignore[attr-defined]
+            for field_name, field in self.schema.fields.items():
+                if (field.attribute or field_name) == name:
+                    self.key_name = field.data_key or field_name
+                    break
 
-        return super(Related, self)._deserialize(value, attr, data, partial=partial)
+        return self.key_name
 
 
 class ForeignKey(fields.Raw):
+    """Foreign key values.
+
+    With `check_exists=True` (see `Meta.validate_fk`) loaded keys are checked in DB
+    with one query per related model for a list of rows, known keys are cached
+    for `cache_ttl` seconds (see `Meta.validate_fk_ttl`).
+    """
+
     string_keys = False
 
+    default_error_messages = {"not_found": "Related object does not exist."}
+
+    def __init__(
+        self,
+        *,
+        check_exists: Optional[bool] = None,
+        cache_ttl: Optional[float] = None,
+        **kwargs,
+    ):
+        self.check_exists = check_exists
+        self.cache_ttl = cache_ttl
+        super(ForeignKey, self).__init__(**kwargs)
+
     def _bind_to_schema(self, field_name, schema):
-        self.string_keys = schema.opts.string_keys
+        opts = schema.opts
+        self.string_keys = opts.string_keys
+        if self.check_exists is None:
+            self.check_exists = getattr(opts, "validate_fk", False)
+        if self.cache_ttl is None:
+            self.cache_ttl = getattr(opts, "validate_fk_ttl", None)
+        self.metadata.setdefault("name", self.attribute or field_name)
         super()._bind_to_schema(field_name, schema)
 
     def get_value(self, obj: pw.Model, attr, **_) -> Any:  # type: ignore[override]
@@ -60,9 +226,26 @@ class ForeignKey(fields.Raw):
 
 
 class FKNested(fields.Nested):
-    """Get an related instance from cache."""
+    """Get an related instance from cache.
+
+    Instances which are not joined raise `KeyError` unless the schema's
+    `Meta.lazy_loads` is set (then they are loaded as the option says).
+    With `memoize` the related instances are serialized once per dump call and
+    the result is reused for other instances which refer them: "shared" returns
+    the same dict, "copy" returns copies of it.
+    """
+
+    def __init__(
+        self,
+        nested: Union[type[Schema], type[pw.Model]],
+        *,
+        memoize: Literal[False, "shared", "copy"] = False,
+        **kwargs,
+    ):
+        if memoize not in (False, "shared", "copy"):
+            raise ValueError("`memoize` must be one of: False, shared, copy")
 
-    def __init__(self, nested: Union[type[Schema], type[pw.Model]], **kwargs):
+        self.memoize = memoize
         if issubclass(nested, pw.Model):
             nested = self.get_schema(nested, **kwargs)
 
@@ -72,13 +255,43 @@ class FKNested(fields.Nested):
     def get_schema(model_cls: type[pw.Model], **kwargs) -> type[Schema]:
         from .schema import ModelSchema
 
-        class Schema(ModelSchema):
-            class Meta:
-                model = model_cls
-                fields = kwargs.get("only", ())
-                exclude = kwargs.get("exclude", ())
+        return ModelSchema.for_model(
+            model_cls,
+            fields=kwargs.get("only", ()),
+            exclude=kwargs.get("exclude", ()),
+        )
+
+    def get_foreign_key(self) -> Optional[pw.ForeignKeyField]:
+        """Get a foreign key of the parent schema model for the field."""
+        model = getattr(getattr(self.parent, "opts", None), "model", None)
+        name = self.attribute or self.name
+        field = model._meta.fields.get(name) if model and name else None
+        return field if isinstance(field, pw.ForeignKeyField) else None
 
-        return Schema
+    def prefetch_related(self, objs: list[pw.Model]):
+        """Load the related instances which are not cached with one query."""
+        prefetch_foreign_keys([self], objs)
+
+    def _serialize(self, value, attr, obj, **kwargs):  # type: ignore[override]
+        state = get_state()
+        included = state.get("included") if state is not None else None
+        if included is not None and value is not None:
+            return include(self, included, value)
+
+        key = value.get_id() if isinstance(value, pw.Model) else None
+        if not self.memoize or state is None or key is None:
+            return super(FKNested, self)._serialize(value, attr, obj, **kwargs)
+
+        memo = state.setdefault("memo", {})
+        schema = self.schema
+        data = memo.get((schema, key))
+        if data is None:
+            data = memo[(schema, key)] = super(FKNested, self)._serialize(
+                value, attr, obj, **kwargs
+            )
+            return data
+
+        return data.copy() if self.memoize == "copy" else data
 
     def get_value(self, obj: pw.Model, attr: str, accessor=None, default=None):
         data_key = self.attribute or attr
@@ -86,4 +299,110 @@ class FKNested(fields.Nested):
         if fk is None:
             return None
 
-        return obj.__rel__[data_key]
+        opts = getattr(self.parent, "opts", None)
+        if getattr(opts, "lazy_loads", None) is None:
+            return obj.__rel__[data_key]
+
+        return getattr(obj, data_key)
+
+
+def prefetch_foreign_keys(
+    nested: Sequence[Union[FKNested, Related]], objs: list[pw.Model]
+):
+    """Load related instances of the fields which are not cached on the instances.
+
+    Instances are loaded with one query per related model (and batch of keys), the
+    selected columns are limited by the field's schema when the model is referred
+    by one field only.
+    """
+    from .schema import ModelSchema
+
+    groups: dict[tuple, list[tuple[pw.ForeignKeyField, fields.Nested]]] = {}
+    for field in nested:
+        fk = field.get_foreign_key()
+        if fk is not None:
+            key = (fk.rel_model, fk.rel_field.name)
+            groups.setdefault(key, []).append((fk, field))
+
+    for (rel_model, _), group in groups.items():
+        rel_field = group[0][0].rel_field
+        query = rel_model.select()
+        schema = group[0][1].schema
+        if (
+            len(group) == 1
+            and isinstance(schema, ModelSchema)
+            and schema.opts.model is rel_model
+        ):
+            query = schema.select(query)
+            if rel_field.name not in {
+                node.name for node in query._returning if isinstance(node, pw.Field)
+            }:
+                query = query.select_extend(rel_field)
+
+        load_related([fk for fk, _ in group], objs, query)
+
+
+def load_related(
+    fks: Sequence[pw.ForeignKeyField],
+    objs: list[pw.Model],
+    query: Optional[pw.ModelSelect] = None,
+):
+    """Load related instances of foreign keys to one model (a query per batch)."""
+    model, rel_model, rel_field = fks[0].model, fks[0].rel_model, fks[0].rel_field
+    models = [obj for obj in objs if isinstance(obj, model)]
+    keys = {
+        obj.__data__[fk.name]
+        for fk in fks
+        for obj in models
+        if obj.__data__.get(fk.name) is not None and fk.name not in obj.__rel__
+    }
+    if not keys:
+        return
+
+    if query is None:
+        query = rel_model.select()
+
+    related = {
+        rel_obj.__data__.get(rel_field.name): rel_obj
+        for batch in pw.chunked(keys, IN_BATCH_SIZE)
+        for rel_obj in query.where(rel_field.in_(batch))
+    }
+    for fk in fks:
+        for obj in models:
+            if fk.name not in obj.__rel__:
+                rel_obj = related.get(obj.__data__.get(fk.name))
+                if rel_obj is not None:
+                    obj.__rel__[fk.name] = rel_obj
+
+
+def include(
+    field: fields.Nested,
+    included: tuple[dict[str, dict], dict[str, tuple]],
+    obj: pw.Model,
+) -> Any:
+    """Serialize the related instance into the side table, return its key.
+
+    Tables are named by the related models tables, keys are formatted as `ForeignKey`
+    does. Every instance is serialized once per dump call.
+    """
+    tables, shapes = included
+    schema = field.schema
+    name = obj._meta.table_name
+    shape = (type(schema), tuple(schema.dump_fields))
+    if shapes.setdefault(name, shape) != shape:
+        raise ValueError(
+            f"Table `{name}` is included with different schemas, "
+            f"use the same nested schema for `{field.name}`"
+        )
+
+    table = tables.setdefault(name, {})
+    key = obj.get_id()
+    opts = getattr(field.parent, "opts", None)
+    if key is not None and getattr(opts, "string_keys", False):
+        key = str(key)
+
+    if key not in table:
+        table[key] = None  # Cyclic references
+        table[key] = schema.dump(obj, many=False)
+
+    return key
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import warnings
+from contextlib import contextmanager
+from threading import Lock
+from typing import Any, Callable, Iterator, Optional
+
+import peewee as pw
+
+from .fields import load_related
+from .state import get_state
+
+# The original `ForeignKeyAccessor.get_rel_instance` while the hook is installed
+GET_REL_INSTANCE: Optional[Callable[[Any, pw.Model], Any]] = None
+
+# Number of running dumps which need the hook
+HOOK_USERS = 0
+HOOK_LOCK = Lock()
+
+
+@contextmanager
+def hooked(policy: Optional[str]) -> Iterator[None]:
+    """Hook foreign key accessors while a dump with a `Meta.lazy_loads` policy runs.
+
+    The hook relies on `ForeignKeyAccessor.get_rel_instance` of peewee 3 (see the
+    peewee version in pyproject.toml), it's removed when the last such dump ends.
+    """
+    if policy not in ("warn", "raise", "batch"):
+        yield
+        return
+
+    global HOOK_USERS  # noqa: PLW0603
+    with HOOK_LOCK:
+        if HOOK_USERS == 0:
+            install()
+        HOOK_USERS += 1
+
+    try:
+        yield
+    finally:
+        with HOOK_LOCK:
+            HOOK_USERS -= 1
+            if HOOK_USERS == 0:
+                uninstall()
+
+
+def install():
+    """Hook foreign key accessors to apply the policy of the current dump call."""
+    global GET_REL_INSTANCE  # noqa: PLW0603
+    if GET_REL_INSTANCE is not None:
+        return
+
+    GET_REL_INSTANCE = get_rel_instance = pw.ForeignKeyAccessor.get_rel_instance
+
+    def hook(accessor: pw.ForeignKeyAccessor, instance: pw.Model):
+        # The accessor loads the instance when it's not cached (peewee 3)
+        name = accessor.name
+        if (
+            name not in instance.__rel__
+            and accessor.field.lazy_load
+            and instance.__data__.get(name) is not None
+        ):
+            state = get_state()
+            lazy = state.get("lazy") if state is not None else None
+            if lazy is not None:
+                check_lazy_load(lazy, accessor.field, instance)
+
+        return get_rel_instance(accessor, instance)
+
+    pw.ForeignKeyAccessor.get_rel_instance = hook  # type: ignore[method-assign]
+
+
+def uninstall():
+    """Restore foreign key accessors."""
+    global GET_REL_INSTANCE  # noqa: PLW0603
+    if GET_REL_INSTANCE is not None:
+        pw.ForeignKeyAccessor.get_rel_instance = GET_REL_INSTANCE  # type: ignore[method-assign]
+        GET_REL_INSTANCE = None
+
+
+def check_lazy_load(
+    lazy: tuple[str, Optional[list]], fk: pw.ForeignKeyField, instance: pw.Model
+):
+    """Apply the policy to a related instance which is going to be loaded lazily.
+
+    "batch" loads the instances for the whole list which is dumped with one query.
+    """
+    policy, objs = lazy
+    if policy == "batch":
+        if objs:
+            load_related([fk], objs)
+        return
+
+    message = (
+        f"{type(instance).__name__}.{fk.name} is loaded lazily with a query, "
+        "join or prefetch the relation"
+    )
+    if policy == "raise":
+        raise RuntimeError(message)
+
+    # Point to the code which reads the accessor (this function, the hook, peewee)
+    warnings.warn(message, RuntimeWarning, stacklevel=4)
@@ -0,0 +1,500 @@
+from __future__ import annotations
+
+import datetime as dt
+import uuid
+from functools import lru_cache, partial
+from typing import TYPE_CHECKING, Any, Callable, Optional, Union
+
+import peewee as pw
+from marshmallow import Schema, fields, missing, utils
+from marshmallow.utils import validate_unknown_parameter_value
+
+from .fields import FKNested, ForeignKey, Related
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping, Sequence
+
+    from .schema import ModelSchema
+
+
+TFormatter = Optional[Callable[[Any], Any]]
+
+# (formatter, a type of values which are already formatted)
+TFormat = tuple[TFormatter, Optional[type]]
+
+
+def format_number(field: fields.Number) -> TFormat:
+    if field.as_string:
+        return format_field(field)
+    return field.num_type, field.num_type
+
+
+def format_datetime(field: fields.DateTime) -> TFormat:
+    data_format = field.format or field.DEFAULT_FORMAT
+    fmt = field.SERIALIZATION_FUNCS.get(data_format)
+    if fmt is None:
+        return format_field(field)
+    return fmt, None
+
+
+def format_field(field: fields.Field) -> TFormat:
+    return partial(field._serialize, attr=None, obj=None), None
+
+
+def format_fk(field: ForeignKey) -> TFormat:
+    if field.string_keys:
+        return str, str
+    return None, None
+
+
+# Field classes which may be dumped straight from `Model.__data__`
+# (the exact class is checked, subclasses may change serialization)
+FORMATTERS: dict[type[fields.Field], Callable[[Any], TFormat]] = {
+    fields.Raw: lambda _: (None, None),
+    fields.String: lambda _: (utils.ensure_text_type, str),
+    fields.Integer: format_number,
+    fields.Float: format_number,
+    fields.Decimal: format_field,
+    fields.Boolean: lambda field: (format_field(field)[0], bool),
+    fields.UUID: format_field,
+    fields.DateTime: format_datetime,
+    fields.Date: format_datetime,
+    fields.Time: format_datetime,
+    ForeignKey: format_fk,
+}
+
+
+# Typecodes of `array.array` for columns of the fields (see `ModelSchema.dump_columns`)
+ARRAY_TYPECODES: dict[type[fields.Field], str] = {
+    fields.Integer: "q",
+    fields.Float: "d",
+    fields.Boolean: "b",
+}
+
+
+def get_typecode(field: fields.Field) -> Optional[str]:
+    """Get a typecode of an array for the field's values (if they are numbers)."""
+    if getattr(field, "as_string", False):
+        return None
+    return ARRAY_TYPECODES.get(type(field))
+
+
+def compile_column(field: fields.Field) -> Callable[[Sequence[Any]], Sequence[Any]]:
+    """Get a function which formats a column of the field's values read from rows."""
+    fmt, native_type = FORMATTERS[type(field)](field)
+    if fmt is None:
+        return lambda values: values
+
+    if native_type is None:
+        return lambda values: [
+            None if value is None else fmt(value) for value in values
+        ]
+
+    return lambda values: [
+        value if value is None or value.__class__ is native_type else fmt(value)
+        for value in values
+    ]
+
+
+# Types of values which JSON encoders (see `encode.Backend.native`) format exactly
+# as the fields do (times are not: orjson fails on timezone-aware ones)
+NATIVE_TYPES: dict[type[fields.Field], type] = {
+    fields.DateTime: dt.datetime,
+    fields.Date: dt.date,
+    fields.UUID: uuid.UUID,
+}
+
+
+def get_native(field: fields.Field) -> Optional[type]:
+    """Get a type of values which could be passed to a native JSON encoder as is."""
+    native = NATIVE_TYPES.get(type(field))
+    if isinstance(field, (fields.DateTime, fields.Date)):
+        data_format = field.format or field.DEFAULT_FORMAT
+        if data_format not in ("iso", "iso8601"):
+            return None
+    return native
+
+
+# Max number of cached bound plans (see `get_bound_plan`)
+PLANS_CACHE_SIZE = 256
+
+# Schema classes which plans are being built (their nested schemas may be built
+# while the fields are checked, see `uses_context`)
+PLANNING: set[type] = set()
+
+
+class BoundPlan:
+    """Schema fields which are bound once and shared by schema instances.
+
+    The plan is taken from a template instance of the schema class for the given
+    `only`/`exclude`/`load_only`/`dump_only` options, so instances skip copying and
+    binding of the declared fields. Instances get shallow copies of the fields
+    mappings, so changing them doesn't affect the plan.
+    """
+
+    __slots__ = (
+        "declared_fields",
+        "fields",
+        "load_fields",
+        "dump_fields",
+        "exclude",
+        "load_only",
+        "dump_only",
+        "error_messages",
+        "dumpers",
+    )
+
+    def __init__(self, template: ModelSchema):
+        self.declared_fields = template.declared_fields
+        self.fields = template.fields
+        self.load_fields = template.load_fields
+        self.dump_fields = template.dump_fields
+        self.exclude = frozenset(template.exclude)
+        self.load_only = frozenset(template.load_only)
+        self.dump_only = frozenset(template.dump_only)
+        self.error_messages = template.error_messages
+        self.dumpers = template._dumpers
+
+    def __setattr__(self, name: str, value: Any):
+        if hasattr(self, name):
+            raise AttributeError(f"{type(self).__name__} is immutable")
+        super().__setattr__(name, value)
+
+    def bind(
+        self,
+        schema: ModelSchema,
+        *,
+        only: Optional[Sequence[str]] = None,
+        exclude: Sequence[str] = (),
+        many: Optional[bool] = None,
+        load_only: Sequence[str] = (),
+        dump_only: Sequence[str] = (),
+        partial: Union[bool, Sequence[str], None] = None,
+        unknown: Optional[str] = None,
+        context: Optional[dict] = None,
+    ):
+        """Initialize the schema instance with the plan (as `Schema.__init__` does)."""
+        opts = schema.opts
+        schema.many = opts.many if many is None else many
+        schema.only = only
+        schema.exclude = set(self.exclude)
+        schema.ordered = opts.ordered
+        schema.load_only = set(self.load_only)
+        schema.dump_only = set(self.dump_only)
+        schema.partial = partial
+        schema.unknown = (
+            opts.unknown
+            if unknown is None
+            else validate_unknown_parameter_value(unknown)
+        )
+        schema.context = context or {}
+        schema.declared_fields = dict(self.declared_fields)
+        schema.fields = dict(self.fields)
+        schema.load_fields = dict(self.load_fields)
+        schema.dump_fields = dict(self.dump_fields)
+        schema.error_messages = dict(self.error_messages)
+        schema._dumpers = self.dumpers
+
+
+@lru_cache(maxsize=PLANS_CACHE_SIZE)
+def get_bound_plan(
+    schema_cls: type[ModelSchema],
+    only: Optional[tuple[str, ...]],
+    exclude: frozenset[str],
+    load_only: frozenset[str],
+    dump_only: frozenset[str],
+) -> Optional[BoundPlan]:
+    """Build a plan for the schema class and options.
+
+    Fields which are resolved on their schema or read its context (see
+    `uses_context`) can't be shared, there is no plan for schemas with them.
+    """
+    schema_cls.init_fields()
+    PLANNING.add(schema_cls)
+    try:
+        if uses_context(schema_cls._declared_fields.values(), {schema_cls}):
+            return None
+    finally:
+        PLANNING.discard(schema_cls)
+
+    template = schema_cls.__new__(schema_cls)
+    template.instance = None
+    template._dumpers = {}
+    Schema.__init__(
+        template, only=only, exclude=exclude, load_only=load_only, dump_only=dump_only
+    )
+    return BoundPlan(template)
+
+
+def uses_context(
+    declared: Iterable[fields.Field], seen: Optional[set[type]] = None
+) -> bool:
+    """Check that the fields read their schema or its context.
+
+    `Method` fields, `Function` fields which take the context and `Nested` fields
+    of schemas with such fields (the nested schemas inherit the context once).
+    """
+    seen = set() if seen is None else seen
+    for field in declared:
+        if isinstance(field, fields.Method):
+            return True
+
+        if isinstance(field, fields.Function):
+            funcs = (field.serialize_func, field.deserialize_func)
+            if any(func and len(utils.get_func_args(func)) > 1 for func in funcs):
+                return True
+
+        inner: list[fields.Field] = []
+        if isinstance(field, fields.List):
+            inner = [field.inner]
+        elif isinstance(field, fields.Tuple):
+            inner = list(field.tuple_fields)
+        elif isinstance(field, fields.Mapping):
+            inner = [f for f in (field.key_field, field.value_field) if f is not None]
+        if inner and uses_context(inner, seen):
+            return True
+
+        if isinstance(field, fields.Nested):
+            nested = get_nested_fields(field.nested, seen)
+            if nested is None or uses_context(nested.values(), seen):
+                return True
+
+    return False
+
+
+def get_nested_fields(
+    nested: Any, seen: set[type]
+) -> Optional[Mapping[str, fields.Field]]:
+    """Get the declared fields of a nested schema (None when it can't be resolved)."""
+    from marshmallow import class_registry
+    from marshmallow.exceptions import RegistryError
+
+    if nested == "self":
+        return {}
+
+    if isinstance(nested, str):
+        try:
+            nested = class_registry.get_class(nested, all=False)
+        except RegistryError:
+            return None
+
+    elif callable(nested) and not isinstance(nested, type):
+        nested = nested()
+
+    if isinstance(nested, dict):
+        return nested
+
+    if isinstance(nested, Schema):
+        if type(nested) in seen:
+            return {}
+
+        seen.add(type(nested))
+        return nested.declared_fields
+
+    if isinstance(nested, type) and issubclass(nested, Schema):
+        if nested in seen:
+            return {}
+
+        seen.add(nested)
+        init_fields = getattr(nested, "init_fields", None)
+        if init_fields is not None:
+            init_fields()
+        return nested._declared_fields
+
+    return None
+
+
+def get_sources(
+    model: type[pw.Model], declared: Mapping[str, fields.Field]
+) -> dict[str, str]:
+    """Map schema fields to keys of `Model.__data__` when they can be read directly."""
+    meta: pw.Metadata = model._meta  # type: ignore[]
+    columns = {}
+    for field in meta.sorted_fields:
+        if isinstance(field, pw.ForeignKeyField):
+            columns[field.object_id_name] = field.name
+        else:
+            columns[field.name] = field.name
+
+    sources: dict[str, str] = {}
+    for name, ma_field in declared.items():
+        ftype = type(ma_field)
+        if ftype not in FORMATTERS:
+            continue
+
+        source: Optional[str] = None
+        if ftype is ForeignKey:
+            fk_name = ma_field.metadata.get("name")
+            if fk_name in meta.fields:
+                source = fk_name
+        else:
+            source = columns.get(ma_field.attribute or name)
+
+        if source is not None:
+            sources[name] = source
+
+    return sources
+
+
+def get_columns(query: pw.Select, model: type[pw.Model]) -> Optional[tuple[str, ...]]:
+    """Get names of the selected columns when the query selects only model fields."""
+    columns = []
+    for node in query._returning:
+        if not isinstance(node, pw.Field) or node.model is not model:
+            return None
+        columns.append(node.name)
+    return tuple(columns)
+
+
+def compile_dump(
+    schema: ModelSchema, columns: Optional[Sequence[str]] = None, native: bool = False
+) -> Callable[[Any, Any], Any]:
+    """Generate a function which serializes a model's data for the given schema.
+
+    The function is called as `dump(obj, data)` where `data` is `obj.__data__`
+    or a row (a dict or a tuple of the given columns) from a query.
+
+    Fields with a known source are read from the data and formatted only when it's
+    required, the rest (nested, custom fields) are serialized from `obj` with the
+    regular marshmallow machinery.
+
+    With `native=True` datetimes and UUIDs are left for a native JSON encoder.
+    """
+    sources = schema._dump_sources
+    namespace: dict[str, Any] = {
+        "dict_class": schema.dict_class,
+        "accessor": schema.get_attribute,
+        "missing": missing,
+    }
+    lines = ["def dump(obj, data):", "    ret = dict_class()"]
+    for idx, (attr, field) in enumerate(schema.dump_fields.items()):
+        key = field.data_key if field.data_key is not None else attr
+        source = sources.get(attr)
+        if source is None:
+            namespace[f"field{idx}"] = field
+            lines += [
+                f"    value = field{idx}.serialize({attr!r}, obj, accessor=accessor)",
+                "    if value is not missing:",
+                f"        ret[{key!r}] = value",
+            ]
+            continue
+
+        if columns is None:
+            lines.append(f"    value = data.get({source!r})")
+        elif source in columns:
+            lines.append(f"    value = data[{columns.index(source)}]")
+        else:
+            lines.append("    value = None")
+
+        fmt, native_type = FORMATTERS[type(field)](field)
+        if native:
+            native_type = get_native(field) or native_type
+
+        if fmt is None:
+            lines.append(f"    ret[{key!r}] = value")
+            continue
+
+        namespace[f"fmt{idx}"] = fmt
+        cond = "value is None"
+        if native_type is not None:
+            namespace[f"native{idx}"] = native_type
+            cond += f" or value.__class__ is native{idx}"
+        lines.append(f"    ret[{key!r}] = value if {cond} else fmt{idx}(value)")
+
+    lines.append("    return ret")
+    exec("\n".join(lines), namespace)  # noqa: S102
+    return namespace["dump"]
+
+
+def select_schema(schema: ModelSchema, query: pw.ModelSelect) -> pw.ModelSelect:
+    """Project the query to the columns which are required to dump the schema."""
+    model = schema.opts.model
+    joined = {model}
+    for joins in query._joins.values():
+        joined.update(dest for dest, *_ in joins)
+
+    columns: list[pw.Node] = []
+    query = project_schema(schema, query, model, columns, joined, ())
+    return query.select(*columns)
+
+
+def project_schema(
+    schema: ModelSchema,
+    query: pw.ModelSelect,
+    source: Union[type[pw.Model], pw.ModelAlias],
+    columns: list[pw.Node],
+    joined: set,
+    path: tuple[type, ...],
+) -> pw.ModelSelect:
+    """Collect the schema columns and join models for nested fields."""
+    from .schema import ModelSchema
+
+    meta: pw.Metadata = schema.opts.model._meta  # type: ignore[union-attr]
+    sources = schema._dump_sources
+    names = {field.name for field in meta.get_primary_keys()}
+    nested: list[tuple[pw.ForeignKeyField, fields.Nested]] = []
+    for attr, field in schema.dump_fields.items():
+        if attr in sources:
+            names.add(sources[attr])
+            continue
+
+        name = field.attribute or attr
+        if isinstance(field, (FKNested, Related)):
+            # Backrefs are not a part of the row
+            fk = meta.fields.get(name)
+            if isinstance(fk, pw.ForeignKeyField):
+                names.add(fk.name)
+                nested.append((fk, field))
+            continue
+
+        # Method/function and custom fields may use any model data
+        pw_field = meta.combined.get(name) if field._CHECK_ATTRIBUTE else None
+        if pw_field is None:
+            names.update(meta.fields)
+        else:
+            names.add(pw_field.name)
+
+    columns.extend(
+        getattr(source, field.name)
+        for field in meta.sorted_fields
+        if field.name in names
+    )
+
+    for fk, field in nested:
+        rel_model = fk.rel_model
+        dest = next(
+            (
+                dest
+                for dest, attr, *_ in query._joins.get(source, [])
+                if attr == fk.name
+            ),
+            None,
+        )
+        if dest is None:
+            dest = rel_model.alias() if rel_model in joined else rel_model
+            joined.add(rel_model)
+            query = query.join_from(
+                source,
+                dest,
+                pw.JOIN.LEFT_OUTER if fk.null else pw.JOIN.INNER,
+                on=getattr(source, fk.name) == getattr(dest, fk.rel_field.name),
+                attr=fk.name,
+            )
+
+        nested_schema = field.schema
+        if (
+            isinstance(nested_schema, ModelSchema)
+            and nested_schema.opts.model is rel_model
+            and type(nested_schema) not in path
+        ):
+            query = project_schema(
+                nested_schema, query, dest, columns, joined, (*path, type(schema))
+            )
+
+        else:
+            columns.extend(
+                getattr(dest, rel_field.name)
+                for rel_field in rel_model._meta.sorted_fields
+            )
+
+    return query
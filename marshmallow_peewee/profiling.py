@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, Callable, Iterator, Optional
+
+import peewee as pw
+from marshmallow import fields
+
+# Stats of the records which are running now (queries are counted for them)
+ACTIVE: ContextVar[tuple[list, ...]] = ContextVar(
+    "marshmallow_peewee_profile", default=()
+)
+
+# The profiler of the running `profile` block (patches are installed)
+PROFILER: Optional[Profiler] = None
+
+# The profiler of the current context (other threads and tasks are not recorded)
+CURRENT: ContextVar[Optional[Profiler]] = ContextVar(
+    "marshmallow_peewee_profiler", default=None
+)
+
+
+class Profiler:
+    """Collect time, calls and DB queries per schema and per field."""
+
+    def __init__(self, hook: Optional[Callable[[dict[str, Any]], Any]] = None):
+        self.hook = hook
+        self.queries = 0
+
+        # {(group, name, operation): [calls, time, queries]}
+        self.stats: dict[tuple[str, str, str], list] = {}
+
+    def record(self, group: str, name: str, operation: str, fn: Callable, *args, **kw):
+        key = (group, name, operation)
+        stat = self.stats.get(key)
+        if stat is None:
+            stat = self.stats[key] = [0, 0.0, 0]
+
+        token = ACTIVE.set((*ACTIVE.get(), stat))
+        start = perf_counter()
+        try:
+            return fn(*args, **kw)
+        finally:
+            stat[0] += 1
+            stat[1] += perf_counter() - start
+            ACTIVE.reset(token)
+
+    def count_query(self):
+        self.queries += 1
+        for stat in ACTIVE.get():
+            stat[2] += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        """Get the collected stats (time is cumulative, in seconds)::
+
+        {
+            "schemas": {"UserSchema": {"dump": {"calls": 1, "time": .1, "queries": 1}}},
+            "fields": {"UserSchema.role": {"serialize": {...}, "deserialize": {...}}},
+            "queries": 1,
+        }
+
+        """
+        result: dict[str, Any] = {"schemas": {}, "fields": {}, "queries": self.queries}
+        for (group, name, operation), (calls, time, queries) in self.stats.items():
+            result[group].setdefault(name, {})[operation] = {
+                "calls": calls,
+                "time": time,
+                "queries": queries,
+            }
+        return result
+
+    def reset(self):
+        self.queries = 0
+        self.stats.clear()
+
+
+def get_field_name(field: fields.Field) -> str:
+    return f"{type(field.parent).__name__}.{field.name}"
+
+
+def wrap(
+    profiler: Profiler,
+    fn: Callable,
+    group: str,
+    operation: str,
+    get_name: Callable[[Any], str],
+) -> Callable:
+    def wrapper(self, *args, **kwargs):
+        if CURRENT.get() is not profiler:
+            return fn(self, *args, **kwargs)
+
+        return profiler.record(
+            group, get_name(self), operation, fn, self, *args, **kwargs
+        )
+
+    return wrapper
+
+
+@contextmanager
+def profile(
+    hook: Optional[Callable[[dict[str, Any]], Any]] = None,
+) -> Iterator[Profiler]:
+    """Profile dump/load calls inside the block.
+
+    `Field.serialize`/`Field.deserialize`, `ModelSchema.dump`/`ModelSchema.load`
+    and `Database.execute_sql` are patched only inside the block, so there is no
+    overhead without profiling. Only calls of the block context (and the contexts
+    copied from it, e.g. tasks) are recorded, other threads are not. Fields which
+    are dumped by compiled dumpers (see `Meta.compiled_dump`) are counted in
+    their schemas time only. The hook is called with the snapshot on exit.
+    """
+    global PROFILER  # noqa: PLW0603
+    from .schema import ModelSchema
+
+    if PROFILER is not None:
+        raise RuntimeError("Profiling is already active")
+
+    profiler = PROFILER = Profiler(hook)
+    schema_name = lambda schema: type(schema).__name__  # noqa: E731
+    patches = [
+        (fields.Field, "serialize", "fields", get_field_name),
+        (fields.Field, "deserialize", "fields", get_field_name),
+        (ModelSchema, "dump", "schemas", schema_name),
+        (ModelSchema, "load", "schemas", schema_name),
+    ]
+    originals = [(cls, name, cls.__dict__[name]) for cls, name, *_ in patches]
+    execute_sql = pw.Database.__dict__["execute_sql"]
+
+    def count_query(db, *args, **kwargs):
+        if CURRENT.get() is profiler:
+            profiler.count_query()
+        return execute_sql(db, *args, **kwargs)
+
+    token = CURRENT.set(profiler)
+    try:
+        for cls, name, group, get_name in patches:
+            method = wrap(profiler, cls.__dict__[name], group, name, get_name)
+            setattr(cls, name, method)
+        pw.Database.execute_sql = count_query  # type: ignore[method-assign]
+        yield profiler
+
+    finally:
+        for cls, name, method in originals:
+            setattr(cls, name, method)
+        pw.Database.execute_sql = execute_sql  # type: ignore[method-assign]
+        CURRENT.reset(token)
+        PROFILER = None
+
+    if profiler.hook is not None:
+        profiler.hook(profiler.snapshot())
@@ -1,26 +1,65 @@
 from __future__ import annotations
 
+from array import array
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from itertools import repeat
+from threading import RLock
 from typing import (
-    TYPE_CHECKING,
+    IO,
     Any,
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
     ClassVar,
     Generic,
     Iterable,
+    Iterator,
     Literal,
     Mapping,
     Optional,
+    Sequence,
     Union,
     overload,
 )
 
 import marshmallow as ma
 import peewee as pw
-from marshmallow import schema
+from marshmallow import missing, schema
+from marshmallow.decorators import POST_DUMP, PRE_DUMP
+from marshmallow.schema import _get_fields_by_mro
 
+from .aio import achunked, run_chunk
+from .bulk import (
+    BulkResult,
+    dump_chunk,
+    get_schema_path,
+    get_value,
+    iter_loaded,
+    load_chunk,
+    load_schema_chunk,
+    merge_chunks,
+)
 from .config import DEFAULTS
 from .convert import DefaultConverter
-from .fields import Related
+from .encode import get_backend
+from .fields import FKNested, ForeignKey, Related, prefetch_foreign_keys
+from .lazy import hooked as lazy_hook
+from .plan import (
+    PLANNING,
+    BoundPlan,
+    compile_column,
+    compile_dump,
+    get_bound_plan,
+    get_columns,
+    get_sources,
+    get_typecode,
+    select_schema,
+)
+from .state import get_state, scope
 from .types import TVModel
+from .validate import validate_foreign_keys
 
 
 class SchemaOpts(ma.SchemaOpts, Generic[TVModel]):
@@ -28,6 +67,12 @@ class SchemaOpts(ma.SchemaOpts, Generic[TVModel]):
     dump_only_pk: bool
     string_keys: bool
     id_keys: bool
+    compiled_dump: bool
+    shared_fields: bool
+    validate_fk: bool
+    validate_fk_ttl: Optional[float]
+    db_validate: Literal["always", "never", "untyped"]
+    lazy_loads: Optional[Literal["allow", "warn", "raise", "batch"]]
     model_converter: type[DefaultConverter]
 
     def __init__(self, meta, **kwargs):
@@ -36,19 +81,53 @@ class SchemaOpts(ma.SchemaOpts, Generic[TVModel]):
         self.dump_only_pk = getattr(meta, "dump_only_pk", DEFAULTS["dump_only_pk"])
         self.string_keys = getattr(meta, "string_keys", DEFAULTS["string_keys"])
         self.id_keys = getattr(meta, "id_keys", DEFAULTS["id_keys"])
+        self.compiled_dump = getattr(meta, "compiled_dump", DEFAULTS["compiled_dump"])
+        self.shared_fields = getattr(meta, "shared_fields", DEFAULTS["shared_fields"])
+        self.validate_fk = getattr(meta, "validate_fk", DEFAULTS["validate_fk"])
+        self.validate_fk_ttl = getattr(
+            meta, "validate_fk_ttl", DEFAULTS["validate_fk_ttl"]
+        )
+
+        self.db_validate = getattr(meta, "db_validate", DEFAULTS["db_validate"])
+        self.lazy_loads = getattr(meta, "lazy_loads", DEFAULTS["lazy_loads"])
 
         if self.model and not issubclass(self.model, pw.Model):
             raise ValueError("`model` must be a subclass of peewee.Model")
 
+        if self.db_validate not in ("always", "never", "untyped"):
+            raise ValueError("`db_validate` must be one of: always, never, untyped")
+
+        if self.lazy_loads not in (None, "allow", "warn", "raise", "batch"):
+            raise ValueError("`lazy_loads` must be one of: allow, warn, raise, batch")
+
         self.model_converter = getattr(meta, "model_converter", DefaultConverter)
 
 
+# Default size of chunks for serializing rows lazily
+DUMP_CHUNK_SIZE = 1000
+
+
+def freeze(value: Any) -> Any:
+    """Make Meta option values hashable."""
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    return value
+
+
 INHERITANCE_OPTIONS = (
     "model",
     "model_converter",
     "dump_only_pk",
     "string_keys",
     "id_keys",
+    "compiled_dump",
+    "shared_fields",
+    "validate_fk",
+    "validate_fk_ttl",
+    "db_validate",
+    "lazy_loads",
     # Basic options
     "datetimeformat",
     "dateformat",
@@ -72,6 +151,26 @@ class SchemaMeta(schema.SchemaMeta):
 
     @classmethod
     def get_declared_fields(cls, klass, cls_fields, inherited_fields, dict_cls=dict):
+        klass._lazy_fields = None
+        klass._dump_sources = {}
+        if getattr(klass.opts, "model", None) is not None and DEFAULTS["lazy_schemas"]:
+            # Model fields are converted on first use (see `ModelSchema.init_fields`)
+            klass._lazy_fields = (cls_fields, dict_cls)
+            return super(SchemaMeta, cls).get_declared_fields(
+                klass, cls_fields, inherited_fields, dict_cls
+            )
+
+        if any(base.__dict__.get("_lazy_fields") for base in klass.__mro__[1:]):
+            for base in klass.__mro__[1:]:
+                if isinstance(base, SchemaMeta):
+                    base.init_fields()  # type: ignore[attr-defined]
+            inherited_fields = _get_fields_by_mro(klass)
+
+        return cls.convert_fields(klass, cls_fields, inherited_fields, dict_cls)
+
+    @classmethod
+    def convert_fields(cls, klass, cls_fields, inherited_fields, dict_cls=dict):
+        """Build the declared fields with the fields converted from the model."""
         opts: SchemaOpts = klass.opts
         base_fields = super(SchemaMeta, cls).get_declared_fields(
             klass, cls_fields, inherited_fields, dict_cls
@@ -86,20 +185,146 @@ class SchemaMeta(schema.SchemaMeta):
             converter = opts.model_converter(opts=opts)
             declared_fields.update(converter.get_fields(model))
         declared_fields.update(base_fields)
+        if model is not None:
+            klass._dump_sources = get_sources(model, declared_fields)
         return declared_fields
 
 
+# Guards conversion of the fields of lazy schemas (see `ModelSchema.init_fields`)
+LAZY_LOCK = RLock()
+
+
 class ModelSchema(ma.Schema, Generic[TVModel], metaclass=SchemaMeta):
     OPTIONS_CLASS = SchemaOpts
 
+    # Generated schema classes (see `for_model`)
+    SCHEMAS_CACHE: ClassVar[dict[tuple, type[ModelSchema]]] = {}
+
     opts: SchemaOpts[TVModel]
     Meta: ClassVar[type[Any]]
 
+    # Schema fields which could be read straight from `Model.__data__`
+    _dump_sources: ClassVar[dict[str, str]]
+
+    # Arguments to convert the fields of a lazy schema (see `init_fields`)
+    _lazy_fields: ClassVar[Optional[tuple[list, type]]] = None
+
     def __init__(self, instance: Optional[TVModel] = None, **kwargs):
+        if self._lazy_fields is not None:
+            self.init_fields()
+
         self.instance = instance
-        super(ModelSchema, self).__init__(**kwargs)
+        self._dumpers: dict[
+            tuple[Optional[tuple[str, ...]], bool], Callable[[Any, Any], Any]
+        ] = {}
+
+        plan = self.get_plan(**kwargs) if self.opts.shared_fields else None
+        if plan is None:
+            super(ModelSchema, self).__init__(**kwargs)
+        else:
+            plan.bind(self, **kwargs)
+
+        # Fields which prefetch backrefs or memoize instances of dumped lists
+        self._prefetch_fields = [
+            field
+            for field in self.dump_fields.values()
+            if isinstance(field, Related) and field.prefetch
+        ]
+        self._memoize = any(
+            isinstance(field, FKNested) and field.memoize
+            for field in self.dump_fields.values()
+        )
+
+    @classmethod
+    def init_fields(cls):
+        """Convert the model fields of a schema class defined with `lazy_schemas`.
+
+        It's called once on the first instantiation of the class, call it directly
+        to access the class `_declared_fields` before.
+        """
+        if cls._lazy_fields is None:
+            return
+
+        with LAZY_LOCK:
+            lazy = cls.__dict__.get("_lazy_fields")
+            if lazy is None:
+                return
+
+            for base in cls.__mro__[1:]:
+                if isinstance(base, SchemaMeta):
+                    base.init_fields()  # type: ignore[attr-defined]
+
+            cls_fields, dict_cls = lazy
+            cls._declared_fields = SchemaMeta.convert_fields(
+                cls, cls_fields, _get_fields_by_mro(cls), dict_cls
+            )
+            cls._lazy_fields = None
+
+    @classmethod
+    def get_plan(
+        cls,
+        *,
+        only: Optional[Sequence[str]] = None,
+        exclude: Sequence[str] = (),
+        load_only: Sequence[str] = (),
+        dump_only: Sequence[str] = (),
+        context: Optional[dict] = None,
+        **_,
+    ) -> Optional[BoundPlan]:
+        """Get a shared bound plan for the options (see `Meta.shared_fields`)."""
+        if context or isinstance(only, str) or isinstance(exclude, str):
+            return None
+
+        # Nested schemas which are built while the class plan is checked
+        if cls in PLANNING:
+            return None
+
+        try:
+            return get_bound_plan(
+                cls,
+                None if only is None else tuple(only),
+                frozenset(exclude),
+                frozenset(load_only),
+                frozenset(dump_only),
+            )
+        except TypeError:  # unhashable options
+            return None
+
+    @classmethod
+    def for_model(cls, model: type[pw.Model], **meta) -> type[ModelSchema]:
+        """Get a schema class for the given model and Meta options.
+
+        Generated classes are cached process-wide by the base class, the model,
+        the options and the current defaults, so the same nested schemas (see
+        `Related`, `FKNested`) are built once.
+        """
+        try:
+            key: Optional[tuple] = (
+                cls,
+                model,
+                tuple(sorted((name, freeze(value)) for name, value in meta.items())),
+                tuple(sorted(DEFAULTS.items())),
+            )
+            schema_cls = cls.SCHEMAS_CACHE.get(key)  # type: ignore[arg-type]
+        except TypeError:  # unhashable options
+            key = schema_cls = None
+
+        if schema_cls is None:
+            # Generated classes are not registered: their names may collide with
+            # user schemas referred by names (e.g. `Nested("RoleSchema")`)
+            schema_meta = type("Meta", (), {"register": False, **meta, "model": model})
+            schema_cls = type(f"{model.__name__}Schema", (cls,), {"Meta": schema_meta})
+            if key is not None:
+                schema_cls = cls.SCHEMAS_CACHE.setdefault(key, schema_cls)
+
+        return schema_cls
 
     @overload  # type: ignore[override]
+    def load(
+        self, data, *, instance: TVModel, apply: Literal["update"], **kwargs
+    ) -> set[str]: ...
+
+    @overload
     def load(
         self, data, *, many: Optional[Literal[False]] = None, **kwargs
     ) -> TVModel: ...
@@ -114,36 +339,875 @@ class ModelSchema(ma.Schema, Generic[TVModel], metaclass=SchemaMeta):
         data: Union[Mapping[str, Any], Iterable[Mapping[str, Any]]],
         *,
         instance: Optional[TVModel] = None,
+        apply: Literal["set", "changed", "update"] = "set",
         **kwargs,
     ):
-        self.instance = instance or self.instance
-        return super().load(data, **kwargs)
+        """Load the data, update the given instance (if any) with it.
+
+        `apply` defines how the instance is updated:
+
+        - "set" - set all the loaded values
+        - "changed" - set only the values which differ from the instance data
+        - "update" - set the changed values and save them with one `UPDATE` query
+          (the changed field names are returned)
+
+        The instance (`self.instance` by default) is kept in the call state, the
+        schema is not changed, so one schema may be shared by threads and tasks.
+        """
+        if apply not in ("set", "changed", "update"):
+            raise ValueError("`apply` must be one of: set, changed, update")
+
+        if instance is None:
+            instance = self.instance
+
+        with scope() as state:
+            prev = state.get("apply"), state.get("instance")
+            state["apply"] = apply
+            state["instance"] = (self, instance)
+            try:
+                return super().load(data, **kwargs)
+            finally:
+                state["apply"], state["instance"] = prev
 
     @ma.post_load
-    def make_instance(self, data: dict[str, Any], **params) -> Union[dict, TVModel]:
+    def make_instance(
+        self, data: dict[str, Any], **params
+    ) -> Union[dict, TVModel, set[str]]:
         """Build object from data."""
         if not self.opts.model:
             return data
 
-        if self.instance is None:
+        state = get_state()
+        instance = self.instance
+        current = state.get("instance") if state is not None else None
+        if current is not None and current[0] is self:
+            instance = current[1]
+
+        if instance is None:
             return self.opts.model(**data)
 
+        apply = state.get("apply") if state is not None else None
+        if apply in ("changed", "update"):
+            return self.apply_changes(instance, data, save=apply == "update")
+
+        for key, value in data.items():
+            setattr(instance, key, value)
+
+        return instance
+
+    @ma.validates_schema(pass_many=True, skip_on_field_errors=False)
+    def check_foreign_keys(self, data, many: bool, **_):
+        """Check that loaded foreign keys exist (see `ForeignKey.check_exists`)."""
+        model = self.opts.model
+        if model is None:
+            return
+
+        fields = {
+            name: field
+            for name, field in self.load_fields.items()
+            if isinstance(field, ForeignKey) and field.check_exists
+        }
+        if not fields:
+            return
+
+        errors = validate_foreign_keys(fields, model, data if many else [data])
+        if errors:
+            raise ma.ValidationError(errors if many else errors[0])
+
+    def apply_changes(
+        self, instance: TVModel, data: Mapping[str, Any], *, save: bool = False
+    ) -> Union[TVModel, set[str]]:
+        """Set only the values which differ from the instance data.
+
+        Values are compared by `db_value`. With `save=True` the changes are written
+        with `Model.update(...).where(pk)` and the changed field names are returned.
+        """
+        meta: pw.Metadata = instance._meta  # type: ignore[attr-defined]
+        changes: dict[pw.Field, Any] = {}
         for key, value in data.items():
-            setattr(self.instance, key, value)
+            field = meta.combined.get(key)
+            if field is None:
+                setattr(instance, key, value)
+                continue
+
+            current = instance.__data__.get(field.name, missing)
+            if current is missing or field.db_value(value) != field.db_value(current):
+                setattr(instance, key, value)
+                changes[field] = instance.__data__.get(field.name)
+
+        if not save:
+            return instance
+
+        changed = {field.name for field in changes}
+        if changes:
+            if instance.get_id() is None:
+                raise ValueError("Unsaved instances can't be updated")
+
+            model = type(instance)
+            model.update(changes).where(instance._pk_expr()).execute()
+            instance._dirty -= changed
+
+        return changed
+
+    def get_bulk_columns(self) -> list[tuple[str, pw.Field]]:
+        """Get the loaded keys and their model fields in `sorted_fields` order."""
+        model = self.opts.model
+        if model is None:
+            raise ValueError("`model` is required to load bulk rows")
+
+        meta = model._meta
+        fields = {}
+        for name, field in self.load_fields.items():
+            key = field.attribute or name
+            pw_field = meta.combined.get(key)
+            if pw_field is not None:
+                fields[pw_field] = key
+
+        return [
+            (fields[field], field) for field in meta.sorted_fields if field in fields
+        ]
+
+    def load_bulk(
+        self,
+        rows: Iterable[Mapping[str, Any]],
+        *,
+        batch_size: int = 1000,
+        as_tuples: bool = False,
+        errors: Optional[dict[int, Any]] = None,
+        **kwargs,
+    ) -> Iterator[list[Any]]:
+        """Validate the rows and yield batches ready for `Model.insert_many`.
+
+        Rows are converted to dicts keyed by column names (or to tuples) of the
+        loaded fields in `model._meta.sorted_fields` order with `db_value` applied,
+        missing values are filled with the fields defaults.
+
+        Invalid rows are skipped and their errors are stored to `errors` by row
+        indexes, when `errors` is not given `ValidationError` is raised.
+        """
+        columns = self.get_bulk_columns()
+        collected: dict[int, Any] = {} if errors is None else errors
+        for batch in iter_loaded(self, rows, batch_size, collected, **kwargs):
+            if errors is None and collected:
+                raise ma.ValidationError(collected)
+
+            result: list[Any] = []
+            for data in batch:
+                values = (
+                    field.db_value(get_value(data, key, field))
+                    for key, field in columns
+                )
+                if as_tuples:
+                    result.append(tuple(values))
+                else:
+                    result.append(
+                        dict(zip((field.column_name for _, field in columns), values))
+                    )
+            yield result
+
+    def insert_bulk(
+        self,
+        rows: Iterable[Mapping[str, Any]],
+        database: Optional[pw.Database] = None,
+        batch_size: int = 1000,
+        **kwargs,
+    ) -> BulkResult:
+        """Validate the rows and insert them with `insert_many` by batches.
+
+        Every batch is inserted inside `database.atomic()`. Invalid rows are skipped,
+        their errors are returned in the result by row indexes.
+        """
+        model = self.opts.model
+        columns = self.get_bulk_columns()
+        fields = [field for _, field in columns]
+        database = database or model._meta.database  # type: ignore[union-attr]
+        result = BulkResult()
+        for batch in iter_loaded(self, rows, batch_size, result.errors, **kwargs):
+            if not batch:
+                continue
+
+            values = [
+                tuple(get_value(data, key, field) for key, field in columns)
+                for data in batch
+            ]
+            with database.atomic():
+                model.insert_many(values, fields=fields).execute()  # type: ignore[union-attr]
+            result.inserted += len(values)
+
+        return result
+
+    def load_upsert(
+        self,
+        rows: Iterable[Mapping[str, Any]],
+        *,
+        key: Optional[str] = None,
+        database: Optional[pw.Database] = None,
+        batch_size: int = 1000,
+        **kwargs,
+    ) -> BulkResult:
+        """Validate the rows, insert the new ones and update the existing ones.
+
+        The rows are matched with existing instances by the `key` field (the primary
+        key by default, the field should be loaded by the schema) with one `IN` query
+        per batch. Matched instances are updated as `load(..., apply="changed")`
+        does and saved with `bulk_update`, new rows are inserted with
+        `insert_many`. Every batch is written inside `database.atomic()`.
+
+        Invalid rows are skipped, their errors are returned in the result by row
+        indexes.
+        """
+        model = self.opts.model
+        columns = self.get_bulk_columns()
+        meta: pw.Metadata = model._meta  # type: ignore[union-attr]
+        key_field = meta.fields.get(key) if key else meta.primary_key
+        loaded = {field: name for name, field in columns}
+        if key_field not in loaded:
+            raise ValueError("`key` should be a model field loaded by the schema")
+
+        key_name = loaded[key_field]
+        fields = [field for _, field in columns]
+        sources = [
+            (
+                name if field.data_key is None else field.data_key,
+                field.attribute or name,
+            )
+            for name, field in self.load_fields.items()
+        ]
+        database = database or meta.database
+        result = BulkResult()
+        for batch in iter_loaded(
+            self, rows, batch_size, result.errors, with_rows=True, **kwargs
+        ):
+            keys = {
+                key_field.db_value(data[key_name])
+                for _, data in batch
+                if data.get(key_name) is not None
+            }
+            existing = {}
+            if keys:
+                query = model.select().where(key_field.in_(list(keys)))  # type: ignore[union-attr]
+                existing = {
+                    key_field.db_value(obj.__data__.get(key_field.name)): obj
+                    for obj in query
+                }
+
+            created: dict[Any, dict[str, Any]] = {}
+            inserts: list[dict[str, Any]] = []
+            updates: dict[int, pw.Model] = {}
+            for row, data in batch:
+                value = data.get(key_name)
+                value = None if value is None else key_field.db_value(value)
+                obj = existing.get(value)
+                if obj is not None:
+                    # Only the given values are updated (not the loaded defaults)
+                    given = {attr for data_key, attr in sources if data_key in row}
+                    self.apply_changes(
+                        obj, {k: v for k, v in data.items() if k in given}
+                    )
+                    if obj._dirty:
+                        updates[id(obj)] = obj
+                        result.updated += 1
+                    else:
+                        result.unchanged += 1
+
+                elif value is not None and value in created:
+                    # Duplicated new rows are merged
+                    pending = created[value]
+                    given_data = {
+                        attr: data[attr]
+                        for data_key, attr in sources
+                        if data_key in row and attr in data
+                    }
+                    if any(pending.get(k, missing) != v for k, v in given_data.items()):
+                        pending.update(given_data)
+                        result.updated += 1
+                    else:
+                        result.unchanged += 1
+
+                else:
+                    inserts.append(data)
+                    if value is not None:
+                        created[value] = data
+                    result.inserted += 1
+
+            if not (inserts or updates):
+                continue
+
+            with database.atomic():
+                if inserts:
+                    values = [
+                        tuple(get_value(data, name, field) for name, field in columns)
+                        for data in inserts
+                    ]
+                    model.insert_many(values, fields=fields).execute()  # type: ignore[union-attr]
+
+                if updates:
+                    objs = list(updates.values())
+                    names = set().union(*(obj._dirty for obj in objs))
+                    model.bulk_update(  # type: ignore[union-attr]
+                        objs, fields=[meta.fields[name] for name in names]
+                    )
+                    for obj in objs:
+                        obj._dirty.clear()
+
+        return result
+
+    def load_parallel(
+        self,
+        rows: Iterable[Mapping[str, Any]],
+        *,
+        workers: Optional[int] = None,
+        chunk_size: int = 10000,
+        as_dicts: bool = False,
+        executor: Optional[Executor] = None,
+        **kwargs,
+    ) -> list[Any]:
+        """Load the rows by chunks in a process pool.
+
+        Workers rebuild the schema by its qualified name (so the schema class should
+        be importable) with the same `only`, `exclude`, `partial`... options.
+
+        Results are returned in the input order, errors are raised as one
+        `ValidationError` with messages by row indexes. With `as_dicts=True` the
+        deserialized data is returned without `post_load` processing (model
+        instances are not created and pickled).
+        """
+        path = get_schema_path(type(self))
+        options = self.get_options()
+        chunks = pw.chunked(rows, chunk_size)
+        args = (repeat(path), repeat(options), chunks, repeat(as_dicts), repeat(kwargs))
+        results: Iterable[tuple[list[Any], Optional[dict]]]
+        if executor is not None:
+            results = executor.map(load_chunk, *args)
+        elif workers is not None and workers < 2:
+            results = map(load_chunk, *args)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(load_chunk, *args))
+
+        loaded, errors = merge_chunks(results, chunk_size)
+        if errors:
+            raise ma.ValidationError(errors, data=rows, valid_data=loaded)
+
+        return loaded
+
+    async def load_async(
+        self,
+        rows: Union[AsyncIterable[Mapping[str, Any]], Iterable[Mapping[str, Any]]],
+        *,
+        chunk_size: int = DUMP_CHUNK_SIZE,
+        as_dicts: bool = False,
+        executor: Optional[Executor] = None,
+        **kwargs,
+    ) -> list[Any]:
+        """Load the rows from a sync or async iterable by chunks.
+
+        The event loop gets control between the chunks, with `executor` the chunks
+        are loaded in it (process pools rebuild the schema by its qualified name as
+        `load_parallel` does). Errors are raised as one `ValidationError` with
+        messages by row indexes.
+        """
+        results = []
+        async for chunk in achunked(rows, chunk_size):
+            if isinstance(executor, ProcessPoolExecutor):
+                path = get_schema_path(type(self))
+                result = await run_chunk(
+                    executor,
+                    load_chunk,
+                    path,
+                    self.get_options(),
+                    chunk,
+                    as_dicts,
+                    kwargs,
+                )
+            else:
+                result = await run_chunk(
+                    executor, load_schema_chunk, self, chunk, as_dicts, kwargs
+                )
+            results.append(result)
+
+        loaded, errors = merge_chunks(results, chunk_size)
+        if errors:
+            raise ma.ValidationError(errors, valid_data=loaded)
+
+        return loaded
+
+    def get_options(self) -> dict[str, Any]:
+        """Get the options to rebuild the schema (e.g. inside workers)."""
+        return {
+            "only": self.only,
+            "exclude": self.exclude,
+            "load_only": self.load_only,
+            "dump_only": self.dump_only,
+            "partial": self.partial,
+            "unknown": self.unknown,
+        }
+
+    def get_dumper(
+        self, columns: Optional[tuple[str, ...]] = None, native: bool = False
+    ) -> Callable[[Any, Any], Any]:
+        """Get a compiled dump function for model data or rows with the given columns.
+
+        With `native=True` the function leaves datetimes and UUIDs unformatted for a
+        native JSON encoder.
+        """
+        key = (columns, native)
+        dumper = self._dumpers.get(key)
+        if dumper is None:
+            dumper = self._dumpers[key] = compile_dump(self, columns, native)
+        return dumper
+
+    def _serialize(self, obj, *, many: bool = False):
+        """Use a compiled dumper when `Meta.compiled_dump` is set or for JSON dumps."""
+        state = get_state()
+        json_state = state and state.get("json")
+        if (
+            not (self.opts.compiled_dump or json_state)
+            or type(self).get_attribute is not ma.Schema.get_attribute
+        ):
+            return super()._serialize(obj, many=many)
+
+        dumper = self.get_dumper(native=json_state == "native")
+        if many and obj is not None:
+            return [
+                (
+                    dumper(item, item.__data__)
+                    if isinstance(item, pw.Model)
+                    else super(ModelSchema, self)._serialize(item)
+                )
+                for item in obj
+            ]
+
+        if isinstance(obj, pw.Model):
+            return dumper(obj, obj.__data__)
+
+        return super()._serialize(obj, many=many)
+
+    def dump_rows(
+        self,
+        rows: Union[pw.Select, Iterable[Union[Mapping[str, Any], Sequence[Any]]]],
+        *,
+        columns: Optional[Sequence[str]] = None,
+    ) -> list[dict[str, Any]]:
+        """Serialize rows from `Select.dicts()` or `Select.tuples()`.
+
+        Tuples contain values of the given `columns` (names of the model fields), by
+        default all the fields in `model._meta.sorted_fields` order. Queries of the
+        schema's model are run with `.tuples()`.
+
+        Values are read from the rows directly, model instances are built only for
+        fields which require them (nested, custom fields).
+        """
+        model, rows, columns = self._get_rows(rows, columns)
+        original = rows
+        if self._hooks[PRE_DUMP]:
+            rows = self._invoke_dump_processors(
+                PRE_DUMP, rows, many=True, original_data=original
+            )
+
+        state = get_state()
+        native = bool(state and state.get("json") == "native")
+        dump_dict = self.get_dumper(native=native)
+        dump_tuple = self.get_dumper(columns, native)
+        flat = self._is_flat()
+        result = []
+        for row in rows:
+            if isinstance(row, Mapping):
+                obj = None if flat else model(__no_default__=1, **row)
+                result.append(dump_dict(obj, row))
+            else:
+                obj = (
+                    None if flat else model(__no_default__=1, **dict(zip(columns, row)))
+                )
+                result.append(dump_tuple(obj, row))
+
+        if self._hooks[POST_DUMP]:
+            result = self._invoke_dump_processors(
+                POST_DUMP, result, many=True, original_data=original
+            )
+
+        return result
+
+    def dump_columns(
+        self,
+        rows: Union[pw.Select, Iterable[Sequence[Any]]],
+        *,
+        columns: Optional[Sequence[str]] = None,
+        arrays: bool = False,
+        chunk_size: int = DUMP_CHUNK_SIZE,
+    ) -> dict[str, Union[list, array]]:
+        """Serialize rows into lists of values per field: `{"id": [...], ...}`.
+
+        Rows are tuples as in `dump_rows`, queries of the schema's model are run with
+        `.tuples()`. Values are read and formatted column by column (by chunks of
+        rows), model instances are built only for fields which require them.
+
+        With `arrays=True` values of integer, float and boolean fields are collected
+        to `array.array` (columns with nulls are lists). Dump hooks are not supported.
+        """
+        if self._hooks[PRE_DUMP] or self._hooks[POST_DUMP]:
+            raise ValueError("Dump hooks are not supported for columns")
+
+        model, rows, columns = self._get_rows(rows, columns)
+
+        result: dict[str, Union[list, array]] = {}
+        plan: list[tuple[str, str, Optional[int], Callable]] = []
+        sources = self._dump_sources
+        for attr, field in self.dump_fields.items():
+            key = field.data_key if field.data_key is not None else attr
+            typecode = get_typecode(field) if arrays else None
+            result[key] = [] if typecode is None else array(typecode)
+
+            source = sources.get(attr)
+            if source is None:
+                plan.append((key, attr, None, field.serialize))
+            elif source in columns:
+                plan.append((key, attr, columns.index(source), compile_column(field)))
+            else:
+                plan.append((key, attr, -1, compile_column(field)))
+
+        flat = all(idx is not None for *_, idx, _ in plan)
+        accessor = self.get_attribute
+        with scope():
+            for chunk in pw.chunked(rows, chunk_size):
+                values = list(zip(*chunk))
+                objs = (
+                    None
+                    if flat
+                    else [
+                        model(__no_default__=1, **dict(zip(columns, row)))
+                        for row in chunk
+                    ]
+                )
+                for key, attr, idx, fmt in plan:
+                    if idx is None:
+                        column = [
+                            None if value is missing else value
+                            for value in (
+                                fmt(attr, obj, accessor=accessor) for obj in objs or ()
+                            )
+                        ]
+                    elif idx < 0:
+                        column = [None] * len(chunk)
+                    else:
+                        column = fmt(values[idx])
+
+                    target = result[key]
+                    if isinstance(target, array):
+                        size = len(target)
+                        try:
+                            target.extend(column)
+                        except (TypeError, OverflowError):
+                            result[key] = target = target[:size].tolist()
+                            target.extend(column)
+                    else:
+                        target.extend(column)
+
+        return result
+
+    def dump_iter(
+        self,
+        query: Union[pw.Select, Iterable[TVModel]],
+        *,
+        chunk_size: Optional[int] = None,
+    ) -> Iterator[Any]:
+        """Serialize the given query (or iterable) lazily.
+
+        Queries are run with `.iterator()` so the rows are not cached. When all the
+        schema fields could be read from rows, queries of the schema's model are run
+        with `.tuples()` and model instances are not created at all.
+
+        The rows are serialized by chunks, the method yields the serialized rows one
+        by one or the chunks when `chunk_size` is given.
+        """
+        source, columns = self._get_source(query)
+        dump: Callable[[list], Any] = partial(self.dump, many=True)
+        if columns:
+            dump = partial(self.dump_rows, columns=columns)
+
+        for chunk in pw.chunked(source, chunk_size or DUMP_CHUNK_SIZE):
+            data = dump(chunk)
+            if chunk_size:
+                yield data
+            else:
+                yield from data
+
+    def dump_json(
+        self,
+        obj: Union[pw.Select, TVModel, Iterable[TVModel]],
+        *,
+        many: Optional[bool] = None,
+        backend: Optional[str] = None,
+    ) -> bytes:
+        """Serialize the given instance(s) or query into JSON (UTF-8 bytes).
+
+        The data is dumped with the compiled dumpers (see `Meta.compiled_dump`), queries
+        are dumped as `dump_iter` does. With a native backend (orjson) datetimes and
+        UUIDs are formatted by the encoder. Decimals are encoded as strings.
+        """
+        encoder = get_backend(backend)
+        with self._json_scope(encoder.native):
+            if isinstance(obj, pw.Select):
+                source, columns = self._get_source(obj)
+                if columns:
+                    data: Any = self.dump_rows(source, columns=columns)
+                else:
+                    data = self.dump(source, many=True)
+            else:
+                data = self.dump(obj, many=many)  # type: ignore[call-overload]
+
+            return encoder.dumps(data)
+
+    def dump_jsonl(
+        self,
+        query: Union[pw.Select, Iterable[TVModel]],
+        fp: IO[bytes],
+        *,
+        chunk_size: Optional[int] = None,
+        backend: Optional[str] = None,
+    ) -> int:
+        """Write the serialized rows as JSON lines into the binary file.
+
+        Rows are dumped by chunks as `dump_iter` does. Returns the number of the
+        written rows.
+        """
+        encoder = get_backend(backend)
+        dumps, write = encoder.dumps, fp.write
+        count = 0
+        with self._json_scope(encoder.native):
+            for chunk in self.dump_iter(
+                query, chunk_size=chunk_size or DUMP_CHUNK_SIZE
+            ):
+                write(b"".join(dumps(data) + b"\n" for data in chunk))
+                count += len(chunk)
+
+        return count
+
+    def dump_normalized(
+        self,
+        obj: Union[pw.Select, TVModel, Iterable[TVModel]],
+        *,
+        many: Optional[bool] = None,
+    ) -> dict[str, Any]:
+        """Serialize the data with related instances moved to side tables.
+
+        `FKNested` and `Related` fields are dumped as keys (lists of keys for
+        backrefs), every related instance is serialized once into
+        `included[table name][key]`. Fields of the same related model share a table
+        and have to use the same nested schema::
+
+            {"data": [{"id": "1", "role": "5"}], "included": {"role": {"5": {...}}}}
+
+        """
+        if isinstance(obj, pw.Select) and many is None:
+            many = True
+
+        with scope() as state:
+            prev = state.get("included")
+            included: dict[str, dict] = {}
+            state["included"] = (included, {})
+            try:
+                data = self.dump(obj, many=many)  # type: ignore[call-overload]
+            finally:
+                state["included"] = prev
+
+        return {"data": data, "included": included}
+
+    @contextmanager
+    def _json_scope(self, native: bool) -> Iterator[None]:
+        """Mark the current dump call as a JSON one (used by the compiled dumpers)."""
+        with scope() as state:
+            prev = state.get("json")
+            state["json"] = "native" if native else "plain"
+            try:
+                yield
+            finally:
+                state["json"] = prev
+
+    async def dump_async(
+        self,
+        rows: Union[pw.Select, AsyncIterable[Any], Iterable[Any]],
+        *,
+        chunk_size: Optional[int] = None,
+        columns: Optional[Sequence[str]] = None,
+        executor: Optional[Executor] = None,
+    ) -> AsyncIterator[Any]:
+        """Serialize the given query, sync or async iterable by chunks.
+
+        The event loop gets control between the chunks, with `executor` the chunks
+        are serialized in it (process pools rebuild the schema by its qualified name
+        as `load_parallel` does). Related instances are loaded by chunks (see
+        `dump_chunk`), so nested fields don't run queries per instance.
+
+        Queries are run as `dump_iter` does. The method yields the serialized rows
+        one by one or the chunks when `chunk_size` is given.
+        """
+        source, selected = self._get_source(rows)
+        columns = tuple(columns) if columns else selected
+        async for chunk in achunked(source, chunk_size or DUMP_CHUNK_SIZE):
+            if isinstance(executor, ProcessPoolExecutor):
+                path = get_schema_path(type(self))
+                data = await run_chunk(
+                    executor, dump_chunk, path, self.get_options(), chunk, columns
+                )
+            else:
+                data = await run_chunk(executor, self.dump_chunk, chunk, columns)
+
+            if chunk_size:
+                yield data
+            else:
+                for item in data:
+                    yield item
+
+    def dump_chunk(
+        self, chunk: list[Any], columns: Optional[Sequence[str]] = None
+    ) -> list[dict[str, Any]]:
+        """Serialize a list of model instances or rows (see `dump_rows`).
 
-        return self.instance
+        Related instances of `FKNested`/`Related` fields which are not joined to the
+        instances are loaded with one query per related model, backrefs of `Related`
+        fields with one query per field.
+        """
+        if chunk and self.opts.model and not isinstance(chunk[0], pw.Model):
+            return self.dump_rows(chunk, columns=columns)
+
+        with scope():
+            prefetch_foreign_keys(
+                [
+                    field
+                    for field in self.dump_fields.values()
+                    if isinstance(field, (FKNested, Related))
+                ],
+                chunk,
+            )
+            return self.dump(chunk, many=True)
+
+    def _get_source(
+        self, rows: Union[pw.Select, AsyncIterable[Any], Iterable[Any]]
+    ) -> tuple[Union[AsyncIterable[Any], Iterable[Any]], Optional[tuple[str, ...]]]:
+        """Prepare queries to iterate, get the selected columns when rows are tuples.
+
+        Queries are run with `.iterator()` so the rows are not cached. When all the
+        schema fields could be read from rows, queries of the schema's model are run
+        with `.tuples()`.
+        """
+        if not isinstance(rows, pw.Select):
+            return rows, None
+
+        if self._is_flat() and not self._hooks[PRE_DUMP]:
+            tuples = self._get_tuples(rows)
+            if tuples is not None:
+                return tuples
+
+        return rows.iterator(), None
+
+    def _get_rows(
+        self,
+        rows: Union[pw.Select, Iterable[Any]],
+        columns: Optional[Sequence[str]] = None,
+    ) -> tuple[type[TVModel], Iterable[Any], tuple[str, ...]]:
+        """Prepare rows of the schema's model to dump, get the columns of tuples.
+
+        Queries are run with `.tuples()`, the columns are the given ones, the selected
+        ones or all the model fields in `model._meta.sorted_fields` order.
+        """
+        model = self.opts.model
+        if model is None:
+            raise ValueError("`model` is required to dump rows")
+
+        if isinstance(rows, pw.Select):
+            tuples = self._get_tuples(rows, columns)
+            if tuples is None:
+                raise ValueError("Query should select only the schema model fields")
+            return (model, *tuples)
+
+        columns = tuple(columns or (field.name for field in model._meta.sorted_fields))
+        return model, rows, columns
+
+    def _get_tuples(
+        self, query: pw.Select, columns: Optional[Sequence[str]] = None
+    ) -> Optional[tuple[Iterator[Any], tuple[str, ...]]]:
+        """Run the query with `.tuples()` when it selects only the schema model fields."""
+        model = self.opts.model
+        columns = columns or (get_columns(query, model) if model else None)
+        if not columns:
+            return None
+
+        return query.tuples().iterator(), tuple(columns)
+
+    def select(self, query: Optional[pw.ModelSelect] = None) -> pw.ModelSelect:
+        """Build a query which selects only the columns required to dump the schema.
+
+        Related models for `FKNested` and `Related` (not backrefs) fields are joined
+        to the query, so the related instances are loaded with the same query.
+        """
+        model = self.opts.model
+        if model is None:
+            raise ValueError("`model` is required to build a query")
+
+        if query is None:
+            query = model.select()
+
+        return select_schema(self, query)
+
+    def _is_flat(self) -> bool:
+        """Check that all the dumped fields could be read from model data."""
+        sources = self._dump_sources
+        return all(name in sources for name in self.dump_fields)
+
+    @overload  # type: ignore[override]
+    def dump(self, obj) -> dict[str, Any]: ...
+
+    @overload
+    def dump(self, obj, *, many: Literal[False]) -> dict[str, Any]: ...
+
+    @overload
+    def dump(self, obj, *, many: Literal[True]) -> list[dict[str, Any]]: ...
 
-    if TYPE_CHECKING:
+    def dump(
+        self, obj: Union[TVModel, Iterable[TVModel]], *, many: Optional[bool] = None
+    ) -> Union[dict[str, Any], list[dict[str, Any]]]:
+        many = self.many if many is None else bool(many)
+        policy = self.opts.lazy_loads
+        related = self._prefetch_fields
+        if policy in (None, "allow") and not (many and (related or self._memoize)):
+            # Nothing to prefetch: skip the call state unless an outer call left
+            # the state which this call has to reset
+            state = get_state() or {}
+            prefetched = state.get("prefetched")
+            if state.get("lazy") is None and not (
+                prefetched and any(field in prefetched for field in related)
+            ):
+                return super().dump(obj, many=many)
 
-        @overload  # type: ignore[override]
-        def dump(self, obj) -> dict[str, Any]: ...
+        with scope() as state, lazy_hook(policy):
+            # Prefetched backrefs and the lazy loads policy belong to this call only:
+            # nested schemas (which may share the field objects, see
+            # `Meta.shared_fields`) set their own
+            prev = state.get("prefetched"), state.get("lazy")
+            state["prefetched"] = {}
+            state["lazy"] = None if policy in (None, "allow") else (policy, None)
+            try:
+                if many and obj is not None:
+                    if related or policy == "batch":
+                        obj = list(obj)  # type: ignore[arg-type]
+                        for field in related:
+                            field.prefetch_related(obj)
 
-        @overload
-        def dump(self, obj, *, many: Literal[False]) -> dict[str, Any]: ...
+                    if policy == "batch":
+                        prefetch_foreign_keys(
+                            [
+                                field
+                                for field in self.dump_fields.values()
+                                if isinstance(field, FKNested)
+                                or (isinstance(field, Related) and field.prefetch)
+                            ],
+                            obj,  # type: ignore[arg-type]
+                        )
+                        # Foreign keys used by other fields are loaded for the list
+                        state["lazy"] = (policy, obj)
 
-        @overload
-        def dump(self, obj, *, many: Literal[True]) -> list[dict[str, Any]]: ...
+                return super().dump(obj, many=many)
 
-        def dump(
-            self, obj: Union[TVModel, Iterable[TVModel]], *, many: Optional[bool] = None
-        ) -> Union[dict[str, Any], list[dict[str, Any]]]: ...
+            finally:
+                state["prefetched"], state["lazy"] = prev
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Optional
+
+# State of the current (top-level) dump/load call shared with nested schemas
+STATE: ContextVar[Optional[dict[str, Any]]] = ContextVar(
+    "marshmallow_peewee_state", default=None
+)
+
+
+def get_state() -> Optional[dict[str, Any]]:
+    """Get the state of the current dump/load call."""
+    return STATE.get()
+
+
+@contextmanager
+def scope() -> Iterator[dict[str, Any]]:
+    """Open a state for a dump/load call (nested calls share the outer state)."""
+    state = STATE.get()
+    if state is not None:
+        yield state
+        return
+
+    state = {}
+    token = STATE.set(state)
+    try:
+        yield state
+    finally:
+        STATE.reset(token)
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from time import monotonic
+from typing import TYPE_CHECKING, Any, Iterable, Optional
+
+import peewee as pw
+
+from .fields import IN_BATCH_SIZE
+
+if TYPE_CHECKING:
+    from .fields import ForeignKey
+
+
+# Max number of cached keys per field
+KNOWN_KEYS_SIZE = 10_000
+
+# Keys which are known to exist by databases and related fields:
+# {(database, field): {key: expires}}
+KNOWN_KEYS: dict[tuple[Any, pw.Field], dict[Any, float]] = {}
+
+
+def get_missing_keys(
+    rel_field: pw.Field, keys: Iterable[Any], ttl: Optional[float] = None
+) -> set[Any]:
+    """Find the keys which don't exist in the related model (a query per batch)."""
+    database = rel_field.model._meta.database
+    if isinstance(database, pw.Proxy):
+        database = database.obj
+
+    keys = set(keys)
+    known = KNOWN_KEYS.get((database, rel_field)) if ttl else None
+    if known:
+        now = monotonic()
+        keys = {key for key in keys if known.get(key, 0) <= now}
+
+    if not keys:
+        return set()
+
+    query = rel_field.model.select(rel_field).tuples()
+    found = {
+        rel_field.db_value(key)
+        for batch in pw.chunked(keys, IN_BATCH_SIZE)
+        for key, in query.where(rel_field.in_(batch))
+    }
+    if ttl:
+        known = KNOWN_KEYS.setdefault((database, rel_field), {})
+        if len(known) + len(found) > KNOWN_KEYS_SIZE:
+            known.clear()
+        expires = monotonic() + ttl
+        known.update(dict.fromkeys(found, expires))
+
+    return keys - found
+
+
+def validate_foreign_keys(
+    fields: dict[str, ForeignKey], model: type[pw.Model], rows: list[dict[str, Any]]
+) -> dict[int, dict[str, list[str]]]:
+    """Check that the rows refer existing instances, return errors by row indexes."""
+    meta: pw.Metadata = model._meta  # type: ignore[attr-defined]
+    errors: dict[int, dict[str, list[str]]] = {}
+    for name, field in fields.items():
+        fk = meta.fields.get(field.metadata.get("name"))
+        if fk is None:
+            continue
+
+        rel_field = fk.rel_field
+        attr = field.attribute or name
+        keys: dict[int, Any] = {}
+        invalid: list[int] = []
+        for idx, row in enumerate(rows):
+            value = row.get(attr) if isinstance(row, dict) else None
+            if value is None:
+                continue
+
+            try:
+                keys[idx] = rel_field.db_value(value)
+            except Exception:  # noqa: BLE001
+                invalid.append(idx)
+
+        missing = get_missing_keys(rel_field, keys.values(), field.cache_ttl)
+        invalid.extend(idx for idx, value in keys.items() if value in missing)
+
+        key = field.data_key if field.data_key is not None else name
+        message = field.error_messages["not_found"]
+        for idx in invalid:
+            errors.setdefault(idx, {})[key] = [message]
+
+    return errors
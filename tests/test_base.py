@@ -6,9 +6,16 @@ import marshmallow as ma
 import peewee as pw
 import pytest
 
+from marshmallow_peewee import ModelSchema
+
 from .models import Role, User, proxy
 
 
+class UserSchema(ModelSchema[User]):
+    class Meta:
+        model = User
+
+
 @pytest.fixture(autouse=True)
 def _setup(db):
     proxy.initialize(db)
@@ -192,3 +199,545 @@ def test_string_fields():
     data = UserSchema().dump(user)
     assert data
     assert data["id"] == 1
+
+
+def test_dump_iter():
+    from marshmallow_peewee import FKNested
+    from marshmallow_peewee import ModelSchema as BaseSchema
+
+    class UserSchema(BaseSchema[User]):
+        role = FKNested(Role)
+
+        class Meta:
+            model = User
+
+    role = Role.create()
+    for idx in range(5):
+        User.create(name=f"user{idx}", role=role)
+
+    def get_query():
+        return User.select(User, Role).join(Role).order_by(User.id)
+
+    schema = UserSchema()
+    expected = schema.dump(get_query(), many=True)
+
+    query = get_query()
+    rows = schema.dump_iter(query)
+    assert not isinstance(rows, list)
+    assert list(rows) == expected
+    assert not query._cursor_wrapper.row_cache
+
+    chunks = list(schema.dump_iter(get_query(), chunk_size=2))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert sum(chunks, []) == expected
+
+    assert list(schema.dump_iter(list(get_query()))) == expected
+
+
+def test_load_bulk(db):
+    from marshmallow_peewee import ModelSchema as BaseSchema
+
+    class UserSchema(BaseSchema[User]):
+        class Meta:
+            model = User
+
+    role = Role.create()
+    rows = [
+        {"name": "Mike", "role": str(role.id), "rating": "5"},
+        {"role": role.id},
+        {"name": "Bob", "role": role.id, "active": False, "title": "Mr"},
+    ]
+
+    schema = UserSchema()
+    with pytest.raises(ma.ValidationError):
+        list(schema.load_bulk(rows))
+
+    errors: dict = {}
+    batches = list(schema.load_bulk(rows, batch_size=2, errors=errors))
+    assert list(errors) == [1]
+    assert "name" in errors[1]
+    assert [len(batch) for batch in batches] == [1, 1]
+
+    mike, bob = (batch[0] for batch in batches)
+    assert list(mike) == ["created", "name", "title", "active", "rating", "role_id"]
+    assert mike["role_id"] == role.id
+    assert mike["rating"] == 5
+    assert mike["active"] is True
+    assert bob["title"] == "Mr"
+
+    (row,), _ = schema.load_bulk(rows, batch_size=2, errors={}, as_tuples=True)
+    assert row[1:] == ("Mike", None, True, 5, role.id)
+
+    result = schema.insert_bulk(rows, batch_size=2)
+    assert result.inserted == 2
+    assert list(result.errors) == [1]
+    assert [user.name for user in User.select().order_by(User.id)] == ["Mike", "Bob"]
+
+
+def test_load_parallel():
+    rows = [{"name": f"user{idx}", "role": idx % 3 + 1} for idx in range(10)]
+    schema = UserSchema(exclude=("title",))
+
+    users = schema.load_parallel(rows, workers=2, chunk_size=3)
+    assert [user.name for user in users] == [row["name"] for row in rows]
+    assert all(isinstance(user, User) for user in users)
+
+    data = schema.load_parallel(rows, workers=1, chunk_size=4, as_dicts=True)
+    assert all(isinstance(item, dict) for item in data)
+    assert data[5]["name"] == "user5"
+    assert data[5]["role"] == 3
+
+    rows[4] = {"role": "invalid"}
+    rows[8] = {"name": "user8", "role": 1, "title": "Mr"}
+    with pytest.raises(ma.ValidationError) as exc:
+        schema.load_parallel(rows, workers=2, chunk_size=3)
+
+    assert set(exc.value.messages) == {4, 8}  # type: ignore[arg-type]
+    assert "name" in exc.value.messages[4]  # type: ignore[index]
+    assert "title" in exc.value.messages[8]  # type: ignore[index]
+
+    class LocalSchema(UserSchema):
+        pass
+
+    with pytest.raises(ValueError, match="importable"):
+        LocalSchema().load_parallel(rows)
+
+
+def test_dump_async(db, tmp_path):
+    import asyncio
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+    from unittest import mock
+
+    from marshmallow_peewee import FKNested
+    from marshmallow_peewee import ModelSchema as BaseSchema
+    from marshmallow_peewee import Related
+
+    class UserRoleSchema(BaseSchema[User]):
+        role = FKNested(Role)
+
+        class Meta:
+            model = User
+
+    role = Role.create(name="admin")
+    for idx in range(5):
+        User.create(name=f"user{idx}", role=role if idx % 2 else Role.create())
+
+    async def rows():
+        # An async backend stand-in
+        for user in User.select().order_by(User.id):
+            await asyncio.sleep(0)
+            yield user
+
+    async def collect(source, **kwargs):
+        return [data async for data in schema.dump_async(source, **kwargs)]
+
+    schema: BaseSchema = UserRoleSchema()
+    expected = schema.dump(
+        User.select(User, Role).join(Role).order_by(User.id), many=True
+    )
+
+    with mock.patch.object(db, "execute_sql", wraps=db.execute_sql) as execute_sql:
+        assert asyncio.run(collect(rows(), chunk_size=None)) == expected
+        # The users query and one roles query per chunk
+        assert execute_sql.call_count == 2
+
+    chunks = asyncio.run(collect(rows(), chunk_size=2))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert sum(chunks, []) == expected
+
+    class UserRelatedSchema(BaseSchema[User]):
+        role = Related()
+
+        class Meta:
+            model = User
+
+    schema = UserRelatedSchema()
+    expected = schema.dump(
+        User.select(User, Role).join(Role).order_by(User.id), many=True
+    )
+    with mock.patch.object(db, "execute_sql", wraps=db.execute_sql) as execute_sql:
+        assert asyncio.run(collect(rows(), chunk_size=None)) == expected
+        assert execute_sql.call_count == 2
+
+    schema = UserSchema()
+    expected = schema.dump(User.select().order_by(User.id), many=True)
+    assert asyncio.run(collect(User.select().order_by(User.id))) == expected
+
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        query = User.select().order_by(User.id)
+        assert asyncio.run(collect(query, executor=executor)) == expected
+
+    # Chunks are dumped in threads (use a database shared between connections)
+    database = pw.SqliteDatabase(tmp_path / "db.sqlite")
+    proxy.initialize(database)
+    database.create_tables([Role, User])
+    role = Role.create(name="admin")
+    User.create(name="Mike", role=role)
+
+    schema = UserRoleSchema()
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        data = asyncio.run(collect(User.select(), executor=pool))
+
+    assert data == [schema.dump(User.select(User, Role).join(Role).get())]
+    database.close()
+
+
+def test_load_async():
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+    rows = [{"name": f"user{idx}", "role": 1} for idx in range(5)]
+    schema = UserSchema(exclude=("title",))
+
+    async def source():
+        for row in rows:
+            yield row
+
+    users = asyncio.run(schema.load_async(source(), chunk_size=2))
+    assert [user.name for user in users] == [row["name"] for row in rows]
+    assert all(isinstance(user, User) for user in users)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        data = asyncio.run(
+            schema.load_async(rows, chunk_size=2, as_dicts=True, executor=executor)
+        )
+    assert isinstance(data[3], dict)
+    assert data[3]["name"] == "user3"
+
+    rows[3] = {"role": "invalid"}
+    with pytest.raises(ma.ValidationError) as exc:
+        asyncio.run(schema.load_async(source(), chunk_size=2))
+
+    assert set(exc.value.messages) == {3}  # type: ignore[arg-type]
+
+
+def test_shared_fields():
+    import warnings
+
+    from marshmallow_peewee import ModelSchema as BaseSchema
+    from marshmallow_peewee.plan import get_bound_plan
+
+    class SharedSchema(BaseSchema[User]):
+        class Meta:
+            model = User
+            shared_fields = True
+
+    role = Role.create(name="admin")
+    user = User.create(name="Mike", role=role)
+
+    schema1, schema2 = SharedSchema(), SharedSchema(instance=user)
+    assert schema1.fields["name"] is schema2.fields["name"]
+    assert schema1.dump(user) == UserSchema().dump(user)
+    assert schema1.instance is None
+    assert schema2.instance
+
+    schema = SharedSchema(only=("id", "name"), many=True)
+    assert schema.fields["name"] is not schema1.fields["name"]
+    assert schema.fields["name"] is SharedSchema(only=["id", "name"]).fields["name"]
+    assert schema.dump([user]) == [{"id": str(user.id), "name": "Mike"}]
+
+    schema = SharedSchema(exclude=("title",), unknown=ma.EXCLUDE)
+    updated = schema.load({"name": "Bob", "title": "Mr", "role": role.id})
+    assert updated.name == "Bob" and updated.title is None
+
+    updated = SharedSchema(instance=user).load({"name": "Bob"}, partial=True)
+    assert updated is user and user.name == "Bob"
+
+    with pytest.raises(ma.ValidationError):
+        SharedSchema().load({"name": "Bob"})
+
+    with pytest.raises(ValueError, match="Invalid fields"):
+        SharedSchema(only=("unknown",))
+
+    # Contexts and Method fields are bound to schema instances
+    with pytest.warns(Warning):
+        schema = SharedSchema(context={"a": 1})
+        assert schema.fields["name"] is not schema1.fields["name"]
+
+    # Instances don't change the plan
+    schema1.dump_fields.pop("name")
+    assert "name" in SharedSchema().dump(user)
+
+    class MethodSchema(SharedSchema):
+        title = ma.fields.Method("get_title")
+
+        def get_title(self, obj):
+            return self.context.get("title")
+
+    assert MethodSchema().fields["name"] is not MethodSchema().fields["name"]
+
+    class FunctionSchema(SharedSchema):
+        title = ma.fields.Function(lambda obj, context: context["title"])
+
+    class NestedSchema(SharedSchema):
+        role = ma.fields.Nested(
+            ma.Schema.from_dict(
+                {"title": ma.fields.Function(lambda obj, context: context["title"])}
+            )
+        )
+
+    for schema_cls in (FunctionSchema, NestedSchema):
+        assert schema_cls().fields["name"] is not schema_cls().fields["name"]
+        for title in ("Mr", "Dr"):
+            schema = schema_cls()
+            schema.context = {"title": title}
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")  # Nested schemas get the context
+                data = schema.dump(user)
+            assert (data.get("title") or data["role"]["title"]) == title
+
+    # Context-free functions are shared
+    class PlainSchema(SharedSchema):
+        title = ma.fields.Function(lambda obj: obj.name)
+
+    assert PlainSchema().fields["title"] is PlainSchema().fields["title"]
+
+    get_bound_plan.cache_clear()
+    assert SharedSchema().fields["name"] is not schema1.fields["name"]
+
+
+def test_load_apply(db):
+    from unittest import mock
+
+    role = Role.create(name="admin")
+    user = User.create(name="Mike", title="Mr", role=role, rating=5)
+    user = User.get_by_id(user.id)
+    schema = UserSchema()
+
+    updated = schema.load(
+        {"name": "Mike", "rating": 5, "title": "Dr"},
+        instance=user,
+        partial=True,
+        apply="changed",
+    )
+    assert updated is user
+    assert user.title == "Dr"
+    assert user.dirty_fields == [User.title]
+
+    user = User.get_by_id(user.id)
+    with mock.patch.object(db, "execute_sql", wraps=db.execute_sql) as execute_sql:
+        changed = schema.load(
+            {"name": "Mike", "rating": "7", "role": role.id, "active": False},
+            instance=user,
+            partial=True,
+            apply="update",
+        )
+        assert changed == {"rating", "active"}
+        assert execute_sql.call_count == 1
+        sql = execute_sql.call_args[0][0]
+        assert sql.startswith("UPDATE") and '"name"' not in sql
+
+    assert not user.dirty_fields
+    user = User.get_by_id(user.id)
+    assert user.rating == 7 and user.active is False
+
+    with mock.patch.object(db, "execute_sql", wraps=db.execute_sql) as execute_sql:
+        changed = schema.load(
+            {"rating": 7}, instance=user, partial=True, apply="update"
+        )
+        assert changed == set()
+        assert not execute_sql.called
+
+    with pytest.raises(ValueError, match="apply"):
+        schema.load({}, instance=user, apply="unknown")  # type: ignore[call-overload]
+
+
+def test_load_upsert(db):
+    from unittest import mock
+
+    from marshmallow_peewee import ModelSchema as BaseSchema
+
+    class UserSchema(BaseSchema[User]):
+        class Meta:
+            model = User
+            dump_only_pk = False
+
+    role = Role.create(name="admin")
+    mike = User.create(name="Mike", role=role, rating=1)
+    bob = User.create(name="Bob", role=role, rating=2)
+
+    rows = [
+        {"id": str(mike.id), "name": "Mike", "role": role.id, "rating": 1},
+        {"id": str(bob.id), "name": "Bob", "role": role.id, "rating": 5},
+        {"name": "Denis", "role": role.id},
+        {"role": role.id, "rating": "invalid"},
+        {"id": "10", "name": "Alex", "role": role.id},
+    ]
+    schema = UserSchema()
+    with mock.patch.object(db, "execute_sql", wraps=db.execute_sql) as execute_sql:
+        result = schema.load_upsert(rows, batch_size=10)
+        queries = [call[0][0].split()[0] for call in execute_sql.call_args_list]
+
+    assert queries.count("SELECT") == 1
+    assert queries.count("INSERT") == 1
+    assert queries.count("UPDATE") == 1
+    assert (result.inserted, result.updated, result.unchanged) == (2, 1, 1)
+    assert set(result.errors) == {3}
+
+    assert User.get_by_id(bob.id).rating == 5
+    assert User.get_by_id(10).name == "Alex"
+    assert User.select().count() == 4
+
+    result = UserSchema(exclude=("id",)).load_upsert(
+        [
+            {"name": "Denis", "role": role.id, "rating": 3},
+            {"name": "Kate", "role": role.id},
+            {"name": "Kate", "role": role.id, "rating": 1},
+        ],
+        key="name",
+    )
+    assert (result.inserted, result.updated, result.unchanged) == (1, 2, 0)
+    assert User.get(User.name == "Denis").rating == 3
+    assert User.get(User.name == "Kate").rating == 1
+
+    with pytest.raises(ValueError, match="key"):
+        UserSchema(exclude=("id",)).load_upsert(rows)
+
+
+def test_profile():
+    from concurrent.futures import ThreadPoolExecutor
+
+    from marshmallow_peewee import Related, profile, profiling
+
+    class RoleSchema(ModelSchema[Role]):
+        user_set = Related()
+
+        class Meta:
+            model = Role
+
+    role = Role.create(name="admin")
+    mike = User.create(name="Mike", role=role)
+
+    snapshots: list[dict] = []
+    serialize = ma.fields.Field.serialize
+    with profile(hook=snapshots.append) as profiler:
+        assert ma.fields.Field.serialize is not serialize
+        RoleSchema().dump(role)
+        UserSchema().load({"name": "Bob", "role": role.id})
+
+        with pytest.raises(RuntimeError), profile():
+            pass
+
+        # Other threads are not recorded
+        with ThreadPoolExecutor(1) as executor:
+            executor.submit(UserSchema().dump, mike).result()
+
+    assert ma.fields.Field.serialize is serialize
+    assert profiling.PROFILER is None
+
+    stats = profiler.snapshot()
+    assert snapshots == [stats]
+    assert stats["queries"] == 1
+
+    dump = stats["schemas"]["RoleSchema"]["dump"]
+    assert dump["calls"] == 1
+    assert dump["queries"] == 1
+    assert dump["time"] > 0
+
+    user_set = stats["fields"]["RoleSchema.user_set"]["serialize"]
+    assert user_set["queries"] == 1
+    assert user_set["time"] <= dump["time"]
+    assert stats["fields"]["RoleSchema.name"]["serialize"]["queries"] == 0
+
+    # Nested schemas are counted too
+    assert stats["schemas"]["UserSchema"]["dump"]["calls"] == 1
+    assert stats["schemas"]["UserSchema"]["load"]["calls"] == 1
+    assert stats["fields"]["UserSchema.name"]["deserialize"]["calls"] == 1
+
+    RoleSchema().dump(role)
+    assert profiler.snapshot() == stats
+
+
+def test_lazy_schemas():
+    from concurrent.futures import ThreadPoolExecutor
+    from unittest import mock
+
+    from marshmallow_peewee import DefaultConverter, Related, setup
+
+    setup(lazy_schemas=True)
+    try:
+
+        class LazySchema(ModelSchema[User]):
+            role = Related()
+
+            class Meta:
+                model = User
+                exclude = ("rating",)
+
+        class LazySubSchema(LazySchema):
+            title = ma.fields.Method("get_title")
+
+            def get_title(self, obj):
+                return obj.name.upper()
+
+    finally:
+        setup(lazy_schemas=False)
+
+    assert LazySchema._lazy_fields is not None
+    assert "name" not in LazySchema._declared_fields
+    assert LazySchema._dump_sources == {}
+
+    role = Role.create(name="admin")
+    user = User.create(name="Mike", role=role)
+
+    get_fields = DefaultConverter.get_fields
+    with mock.patch.object(
+        DefaultConverter, "get_fields", autospec=True, side_effect=get_fields
+    ) as converted, ThreadPoolExecutor(4) as executor:
+        schemas = list(executor.map(lambda _: LazySubSchema(), range(8)))
+
+    # Once per class
+    models = [call.args[1] for call in converted.call_args_list]
+    assert models.count(User) == 2
+    assert LazySchema._lazy_fields is None
+    assert LazySubSchema._lazy_fields is None
+    assert "name" in LazySchema._declared_fields
+    assert LazySubSchema._dump_sources
+
+    class EagerSubSchema(UserSchema):
+        role = Related()
+        title = ma.fields.Method("get_title")
+
+        class Meta:
+            exclude = ("rating",)
+
+        def get_title(self, obj):
+            return obj.name.upper()
+
+    data = schemas[0].dump(user)
+    assert data == EagerSubSchema().dump(user)
+    assert data["title"] == "MIKE"
+    assert data["role"]["name"] == "admin"
+    assert "rating" not in data
+
+
+def test_load_shared_schema():
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    class SlowSchema(UserSchema):
+        @ma.pre_load
+        def wait(self, data, **_):
+            time.sleep(0.001)  # Switch threads between `load` and `post_load`
+            return data
+
+        class Meta:
+            exclude = ("role",)
+
+    schema = SlowSchema(partial=True)
+    users = [User(id=idx, name="") for idx in range(200)]
+
+    def load(user):
+        return user, schema.load({"name": f"user{user.id}"}, instance=user)
+
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(load, users))
+
+    assert all(loaded is user for user, loaded in results)
+    assert all(user.name == f"user{user.id}" for user in users)
+    assert schema.instance is None
+
+    # The instance given to the schema is a default
+    user = User(id=1, name="Mike")
+    assert SlowSchema(instance=user, partial=True).load({"name": "Bob"}) is user
+    assert isinstance(SlowSchema().load({"name": "Bob"}), User)
@@ -58,3 +58,64 @@ def test_register(converter: DefaultConverter):
     assert ma_field
     assert isinstance(ma_field, ma.fields.String)
     assert ma_field.load_default == "yes"
+
+
+def test_builders_cache(converter: DefaultConverter):
+    from marshmallow_peewee.convert import DefaultConverter, convert_charfield
+
+    from .models import SubclassedCharField
+
+    ma_field = converter.convert(User.name)
+    assert isinstance(ma_field, ma.fields.String)
+    assert converter.BUILDERS_CACHE[SubclassedCharField] is convert_charfield
+    assert converter.BUILDERS_CACHE is not DefaultConverter.BUILDERS_CACHE
+
+    DefaultConverter.get_builder(pw.CharField)
+    converter.register(pw.CharField, ma.fields.Raw)
+    assert not converter.BUILDERS_CACHE
+    assert pw.CharField in DefaultConverter.BUILDERS_CACHE
+
+    ma_field = converter.convert(User.name)
+    assert type(ma_field) is ma.fields.Raw
+
+
+@pytest.mark.parametrize(
+    ("db_validate", "expected"),
+    [
+        ("always", {"rating": True, "role": True, "data": True, "code": True}),
+        ("never", {"rating": False, "role": False, "data": False, "code": False}),
+        ("untyped", {"rating": False, "role": True, "data": True, "code": True}),
+    ],
+)
+def test_db_validate(db_validate, expected):
+    from marshmallow_peewee.convert import DefaultConverter
+    from marshmallow_peewee.schema import SchemaOpts
+
+    class CodeField(pw.IntegerField):
+        def db_value(self, value):
+            return int(str(value), 16)
+
+    class Test(pw.Model):
+        rating = pw.IntegerField()
+        role = pw.ForeignKeyField(User)
+        data = pw.BlobField()
+        code = CodeField()
+
+    class Meta:
+        model = Test
+
+    Meta.db_validate = db_validate  # type: ignore[attr-defined]
+    converter = DefaultConverter(SchemaOpts(Meta))
+    for name, validated in expected.items():
+        ma_field = converter.convert(Test._meta.fields[name])
+        assert bool(ma_field.validators) is validated, name
+
+
+def test_db_validate_invalid():
+    from marshmallow_peewee.schema import SchemaOpts
+
+    class Meta:
+        db_validate = "sometimes"
+
+    with pytest.raises(ValueError, match="db_validate"):
+        SchemaOpts(Meta)
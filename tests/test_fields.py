@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import Any
+
 import pytest
 
 from .models import Role, User, proxy
@@ -47,3 +49,518 @@ def test_fknested():
     assert data
     assert data["user_role"]
     assert "id" not in data["user_role"]
+
+
+def test_related_prefetch(db):
+    from unittest import mock
+
+    from marshmallow_peewee import ModelSchema, Related
+
+    class RoleSchema(ModelSchema[Role]):
+        user_set = Related(meta={"fields": ("id", "name")})
+
+        class Meta:
+            model = Role
+            string_keys = False
+
+    for idx in range(3):
+        role = Role.create(name=f"role{idx}")
+        for num in range(3):
+            User.create(name=f"user{idx}{num}", role=role)
+
+    roles = list(Role.select().order_by(Role.id))
+    expected = [RoleSchema().dump(role) for role in roles]
+    assert [len(data["user_set"]) for data in expected] == [3, 3, 3]
+
+    with mock.patch.object(db, "execute_sql", wraps=db.execute_sql) as execute:
+        data = RoleSchema().dump(roles, many=True)
+
+    assert execute.call_count == 1
+    assert data == expected
+
+    # Keys are split into batches
+    with mock.patch.object(db, "execute_sql", wraps=db.execute_sql) as execute:
+        with mock.patch("marshmallow_peewee.fields.IN_BATCH_SIZE", 2):
+            assert RoleSchema().dump(roles, many=True) == expected
+
+    assert execute.call_count == 2
+
+    # Dumps without anything to prefetch don't open a call state
+    with mock.patch("marshmallow_peewee.schema.scope") as scope:
+        assert RoleSchema().dump(roles[0]) == expected[0]
+        scope.assert_not_called()
+
+        RoleSchema().dump(roles, many=True)
+        scope.assert_called_once()
+
+    class RoleSchema2(ModelSchema[Role]):
+        user_set = Related(limit=2)
+
+        class Meta:
+            model = Role
+
+    data = RoleSchema2().dump(Role.select(), many=True)
+    assert [len(role["user_set"]) for role in data] == [2, 2, 2]
+
+    assert len(RoleSchema2().dump(roles[0])["user_set"]) == 2
+
+
+def test_related_prefetch_recursive(db):
+    import peewee as pw
+
+    from marshmallow_peewee import ModelSchema, Related
+
+    class Category(pw.Model):
+        name = pw.CharField()
+        parent = pw.ForeignKeyField("self", null=True, backref="children")
+
+        class Meta:
+            database = proxy
+
+    db.create_tables([Category])
+    for name in ("a", "b"):
+        root = Category.create(name=name)
+        child = Category.create(name=f"{name}1", parent=root)
+        Category.create(name=f"{name}11", parent=child)
+
+    def make_schema(shared_fields):
+        class CategorySchema(ModelSchema[Category]):
+            children = Related(
+                lambda: CategorySchema(), many=True  # type: ignore[arg-type]
+            )
+
+            Meta = type(
+                "Meta",
+                (),
+                {
+                    "model": Category,
+                    "fields": ("name", "children"),
+                    "shared_fields": shared_fields,
+                },
+            )
+
+        return CategorySchema
+
+    roots = list(Category.select().where(Category.parent.is_null()))
+    expected = [
+        {"name": "a", "children": [{"name": "a1", "children": [{"name": "a11"}]}]},
+        {"name": "b", "children": [{"name": "b1", "children": [{"name": "b11"}]}]},
+    ]
+    for item in expected:
+        item["children"][0]["children"][0]["children"] = []  # type: ignore[index]
+
+    # Nested schemas share the fields (and the prefetched backrefs) with shared plans
+    for shared_fields in (False, True):
+        schema = make_schema(shared_fields)()
+        assert schema.dump(roots, many=True) == expected
+        assert [schema.dump(root) for root in roots] == expected
+
+
+def test_nested_schemas_cache():
+    from marshmallow_peewee import FKNested, ModelSchema, Related, setup
+
+    class UserSchema(ModelSchema[User]):
+        role = Related(meta={"fields": ["id", "name"]})
+        user_role = FKNested(Role, only=("name",), attribute="role")
+
+        class Meta:
+            model = User
+
+    class UserSchema2(ModelSchema[User]):
+        role = Related(meta={"fields": ("id", "name")})
+        user_role = FKNested(Role, only=("name",), attribute="role")
+
+        class Meta:
+            model = User
+
+    fields1: Any = UserSchema._declared_fields
+    fields2: Any = UserSchema2._declared_fields
+    assert fields1["role"].nested is fields2["role"].nested
+    assert fields1["user_role"].nested is fields2["user_role"].nested
+    assert fields1["role"].nested is not fields1["user_role"].nested
+    assert fields1["role"].nested.__name__ == "RoleSchema"
+
+    assert ModelSchema.for_model(Role) is ModelSchema.for_model(Role)
+    assert ModelSchema.for_model(Role) is not ModelSchema.for_model(User)
+    assert ModelSchema.for_model(Role, string_keys=False) is not ModelSchema.for_model(
+        Role
+    )
+
+    # Defaults are a part of the key
+    schema_cls = ModelSchema.for_model(Role)
+    setup(string_keys=False)
+    try:
+        assert ModelSchema.for_model(Role) is not schema_cls
+    finally:
+        setup(string_keys=True)
+
+    ModelSchema.SCHEMAS_CACHE.clear()
+    assert ModelSchema.for_model(Role) is not schema_cls
+
+
+def test_nested_schemas_registry(db):
+    import marshmallow as ma
+    import peewee as pw
+
+    from marshmallow_peewee import ModelSchema, Related
+
+    class Badge(pw.Model):
+        name = pw.CharField()
+
+        class Meta:
+            database = proxy
+
+    class Holder(pw.Model):
+        badge = pw.ForeignKeyField(Badge)
+
+        class Meta:
+            database = proxy
+
+    class BadgeSchema(ModelSchema[Badge]):
+        class Meta:
+            model = Badge
+            fields = ("name",)
+
+    # Generated `BadgeSchema` classes don't clash with the user schema in the registry
+    class HolderSchema(ModelSchema[Holder]):
+        badge = Related()
+
+        class Meta:
+            model = Holder
+
+    class PayloadSchema(ma.Schema):
+        badge = ma.fields.Nested("BadgeSchema")
+
+    assert ModelSchema.for_model(Badge).__name__ == "BadgeSchema"
+
+    db.create_tables([Badge, Holder])
+    badge = Badge.create(name="gold")
+    holder = Holder.create(badge=badge)
+    assert HolderSchema().dump(holder)["badge"] == {"id": str(badge.id), "name": "gold"}
+    assert PayloadSchema().dump({"badge": badge}) == {"badge": {"name": "gold"}}
+
+
+def test_foreign_key_check_exists(db):
+    from unittest import mock
+
+    import marshmallow as ma
+    import peewee as pw
+
+    from marshmallow_peewee import ForeignKey, ModelSchema
+    from marshmallow_peewee.validate import KNOWN_KEYS
+
+    class UserSchema(ModelSchema[User]):
+        class Meta:
+            model = User
+            validate_fk = True
+
+    admin, user = Role.create(name="admin"), Role.create(name="user")
+    rows = [
+        {"name": "Mike", "role": admin.id},
+        {"name": "Bob", "role": 100},
+        {"name": "Denis", "role": user.id},
+        {"role": 200},
+    ]
+
+    schema = UserSchema()
+    with mock.patch.object(db, "execute_sql", wraps=db.execute_sql) as execute_sql:
+        with pytest.raises(ma.ValidationError) as exc:
+            schema.load(rows, many=True)
+        assert execute_sql.call_count == 1
+
+    messages: Any = exc.value.messages
+    assert set(messages) == {1, 3}
+    assert messages[1] == {"role": ["Related object does not exist."]}
+    assert set(messages[3]) == {"name", "role"}
+
+    users = schema.load([rows[0], rows[2]], many=True)
+    assert [user.role_id for user in users] == [admin.id, user.id]
+
+    with pytest.raises(ma.ValidationError) as exc:
+        schema.load(rows[1])
+    assert exc.value.messages == {"role": ["Related object does not exist."]}
+
+    # Bulk loads collect the errors by rows
+    result = schema.insert_bulk(rows)
+    assert result.inserted == 2
+    assert set(result.errors) == {1, 3}
+
+    # Known keys are cached
+    class CachedSchema(ModelSchema[User]):
+        role = ForeignKey(check_exists=True, cache_ttl=60)
+
+        class Meta:
+            model = User
+
+    cached = CachedSchema()
+    cached.load(rows[0])
+    with mock.patch.object(db, "execute_sql", wraps=db.execute_sql) as execute_sql:
+        cached.load(rows[0])
+        assert not execute_sql.called
+
+        with pytest.raises(ma.ValidationError):
+            cached.load(rows[1])
+        assert execute_sql.call_count == 1
+
+    # Keys are cached per database
+    other = pw.SqliteDatabase(":memory:")
+    with other.bind_ctx([Role, User]):
+        other.create_tables([Role, User])
+        with pytest.raises(ma.ValidationError):
+            cached.load(rows[0])
+
+    proxy.initialize(other)
+    try:
+        with pytest.raises(ma.ValidationError):
+            cached.load(rows[0])
+    finally:
+        proxy.initialize(db)
+
+    # Keys are checked in batches
+    with mock.patch.object(db, "execute_sql", wraps=db.execute_sql) as execute_sql:
+        with mock.patch("marshmallow_peewee.validate.IN_BATCH_SIZE", 2):
+            with pytest.raises(ma.ValidationError) as exc:
+                schema.load(rows, many=True)
+        assert execute_sql.call_count == 2
+    assert set(exc.value.messages) == {1, 3}
+
+    KNOWN_KEYS.clear()
+
+
+def test_related_identity_map():
+    from marshmallow_peewee import ModelSchema, Related
+
+    class UserSchema(ModelSchema[User]):
+        role = Related(meta={"dump_only_pk": False})
+
+        class Meta:
+            model = User
+
+    admin = {"id": "5", "name": "admin"}
+    rows = [
+        {"name": "Mike", "role": admin},
+        {"name": "Bob", "role": dict(admin)},
+        {"name": "Denis", "role": 5},
+        {"name": "Kate", "role": {"id": "5", "name": "other"}},
+        {"name": "Alex", "role": {"name": "new"}},
+        {"name": "John", "role": 6},
+    ]
+
+    schema = UserSchema()
+    users = schema.load(rows, many=True)
+    mike, bob, denis, kate, alex, john = users
+    assert isinstance(mike.role, Role)
+    assert mike.role.id == "5"
+    assert bob.role is mike.role
+    assert denis.role is mike.role
+    assert kate.role is not mike.role and kate.role.name == "other"
+    assert alex.role.id is None
+    assert john.role_id == 6
+
+    # The map is scoped to a load call
+    assert schema.load(rows[0]).role is not mike.role
+
+
+@pytest.mark.parametrize("memoize", [False, "shared", "copy"])
+def test_fknested_memoize(memoize):
+    from unittest import mock
+
+    from marshmallow_peewee import FKNested, ModelSchema
+
+    class UserSchema(ModelSchema[User]):
+        role = FKNested(Role, memoize=memoize)
+
+        class Meta:
+            model = User
+
+    admin, user = Role.create(name="admin"), Role.create(name="user")
+    for idx in range(6):
+        User.create(name=f"user{idx}", role=admin if idx % 3 else user)
+
+    query = User.select(User, Role).join(Role).order_by(User.id)
+    schema = UserSchema()
+    nested: Any = schema.fields["role"]
+    with mock.patch.object(nested.schema, "dump", wraps=nested.schema.dump) as dump:
+        data = schema.dump(query, many=True)
+        assert dump.call_count == (2 if memoize else 6)
+
+    assert [item["role"]["name"] for item in data] == [
+        "user",
+        "admin",
+        "admin",
+        "user",
+        "admin",
+        "admin",
+    ]
+    assert (data[1]["role"] is data[2]["role"]) is (memoize == "shared")
+    assert data[1]["role"] == data[2]["role"]
+
+    # Memoized values live in a dump call
+    assert schema.dump(query.get())["role"] is not data[0]["role"]
+
+    with pytest.raises(ValueError, match="memoize"):
+        FKNested(Role, memoize=True)  # type: ignore[arg-type]
+
+
+def test_dump_normalized():
+    from marshmallow_peewee import FKNested, ModelSchema, Related
+
+    class UserSchema(ModelSchema[User]):
+        role = FKNested(Role, memoize="shared")
+
+        class Meta:
+            model = User
+            fields = ("id", "name", "role")
+
+    admin, user = Role.create(name="admin"), Role.create(name="user")
+    for idx in range(4):
+        User.create(name=f"user{idx}", role=admin if idx % 2 else user)
+
+    query = User.select(User, Role).join(Role).order_by(User.id)
+    result = UserSchema().dump_normalized(query)
+    assert result["data"][:2] == [
+        {"id": "1", "name": "user0", "role": str(user.id)},
+        {"id": "2", "name": "user1", "role": str(admin.id)},
+    ]
+    assert result["included"] == {
+        "role": {
+            str(user.id): {"id": str(user.id), "name": "user"},
+            str(admin.id): {"id": str(admin.id), "name": "admin"},
+        }
+    }
+
+    # Inline dumps are not affected
+    assert UserSchema().dump(query.get())["role"] == {
+        "id": str(user.id),
+        "name": "user",
+    }
+
+    class RoleSchema(ModelSchema[Role]):
+        user_set = Related(meta={"fields": ("id", "name", "role")})
+
+        class Meta:
+            model = Role
+            string_keys = False
+
+    result = RoleSchema().dump_normalized(admin)
+    assert result["data"] == {"id": admin.id, "name": "admin", "user_set": [2, 4]}
+    assert set(result["included"]["user"]) == {2, 4}
+    assert result["included"]["user"][2]["name"] == "user1"
+
+    # Fields of the same model share a table
+    class PairSchema(ModelSchema[User]):
+        role = FKNested(Role, only=("id", "name"))
+        other = FKNested(Role, attribute="role", only=("id", "name"), dump_only=True)
+
+        class Meta:
+            model = User
+            fields = ("id", "role", "other")
+
+    mike = query.get()
+    result = PairSchema().dump_normalized(mike)
+    assert result["data"] == {"id": "1", "role": str(user.id), "other": str(user.id)}
+    assert list(result["included"]) == ["role"]
+
+    # Different schemas of one table are not merged
+    class ConflictSchema(PairSchema):
+        other = FKNested(Role, attribute="role", only=("id",), dump_only=True)
+
+    with pytest.raises(ValueError, match="`role` is included with different schemas"):
+        ConflictSchema().dump_normalized(mike)
+
+
+def test_lazy_loads(db):
+    import warnings
+    from unittest import mock
+
+    import marshmallow as ma
+    import peewee as pw
+
+    from marshmallow_peewee import FKNested, ModelSchema, Related, lazy
+
+    def make_schema(lazy_loads, nested):
+        class UserSchema(ModelSchema[User]):
+            role = nested()
+
+            Meta = type(
+                "Meta",
+                (),
+                {"model": User, "fields": ("id", "role"), "lazy_loads": lazy_loads},
+            )
+
+        return UserSchema
+
+    admin, user = Role.create(name="admin"), Role.create(name="user")
+    for name, role in (("Mike", admin), ("Bob", user), ("Kate", admin)):
+        User.create(name=name, role=role)
+
+    expected = make_schema(None, lambda: FKNested(Role))().dump(
+        User.select(User, Role).join(Role).order_by(User.id), many=True
+    )
+    assert [item["role"]["name"] for item in expected] == ["admin", "user", "admin"]
+
+    def custom():
+        # Custom fields which use peewee accessors are checked too
+        return ma.fields.Function(
+            lambda obj: {"id": str(obj.role.id), "name": obj.role.name}
+        )
+
+    def fknested():
+        return FKNested(Role)
+
+    # FKNested fields require joined instances unless the option is set
+    with pytest.raises(KeyError):
+        make_schema(None, fknested)().dump(User.select(), many=True)
+
+    for nested in (fknested, Related, custom):
+        for lazy_loads in ("allow",) if nested is fknested else ("allow", None):
+            schema = make_schema(lazy_loads, nested)()
+            query = User.select().order_by(User.id)
+            with mock.patch.object(
+                db, "execute_sql", wraps=db.execute_sql
+            ) as execute_sql:
+                assert schema.dump(query, many=True) == expected
+                assert execute_sql.call_count == 4
+
+        schema = make_schema("warn", nested)()
+        with pytest.warns(RuntimeWarning, match="User.role") as warns:
+            assert schema.dump(User.select().order_by(User.id), many=True) == expected
+        assert warns[0].filename != pw.__file__
+
+        schema = make_schema("raise", nested)()
+        with pytest.raises(RuntimeError, match="User.role"):
+            schema.dump(User.select().order_by(User.id), many=True)
+
+        # Joined instances are fine
+        query = User.select(User, Role).join(Role).order_by(User.id)
+        assert schema.dump(query, many=True) == expected
+
+        schema = make_schema("batch", nested)()
+        query = User.select().order_by(User.id)
+        with mock.patch.object(db, "execute_sql", wraps=db.execute_sql) as execute_sql:
+            assert schema.dump(query, many=True) == expected
+            assert execute_sql.call_count == 2
+
+            # Keys are loaded in batches
+            query = User.select().order_by(User.id)
+            with mock.patch("marshmallow_peewee.fields.IN_BATCH_SIZE", 1):
+                assert schema.dump(query, many=True) == expected
+            assert execute_sql.call_count == 5
+
+    # Only dumps are checked, accessors are hooked while they run
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert User.get(User.name == "Bob").role.name == "user"
+    assert lazy.GET_REL_INSTANCE is None
+    assert "hook" not in pw.ForeignKeyAccessor.get_rel_instance.__qualname__
+
+    # The hook relies on peewee accessors loading the not cached instances
+    bob = User.get(User.name == "Bob")
+    assert "role" not in bob.__rel__ and bob.__data__["role"] == user.id
+    accessor = User.__dict__["role"]
+    assert isinstance(accessor, pw.ForeignKeyAccessor)
+    assert accessor.get_rel_instance(bob) == user
+    assert bob.__rel__["role"] == user
+
+    with pytest.raises(ValueError, match="lazy_loads"):
+        make_schema("unknown", Related)
@@ -0,0 +1,357 @@
+from __future__ import annotations
+
+import datetime as dt
+import decimal
+import uuid
+from typing import Any
+
+import marshmallow as ma
+import peewee as pw
+import pytest
+
+from marshmallow_peewee import FKNested, ModelSchema
+
+from .models import Role, User, proxy
+
+
+class Item(pw.Model):
+    uid = pw.UUIDField(default=uuid.uuid4)
+    price = pw.DecimalField(default=decimal.Decimal("9.99"))
+    weight = pw.FloatField(null=True)
+    day = pw.DateField(default=dt.date.today)
+    moment = pw.TimeField(default=lambda: dt.time(12, 30))
+    user = pw.ForeignKeyField(User, null=True)
+
+    class Meta:
+        database = proxy
+
+
+@pytest.fixture(autouse=True)
+def _setup(db):
+    proxy.initialize(db)
+    db.create_tables([Role, User])
+
+
+def compiled(schema_cls: type[ModelSchema]) -> type[ModelSchema]:
+    meta = type("Meta", (schema_cls.Meta,), {"compiled_dump": True})
+    return type(f"Compiled{schema_cls.__name__}", (schema_cls,), {"Meta": meta})
+
+
+@pytest.mark.parametrize(
+    "meta",
+    [
+        {},
+        {"string_keys": False},
+        {"id_keys": True},
+        {"datetimeformat": "timestamp"},
+        {"fields": ("id", "name", "role")},
+        {"exclude": ("created",)},
+    ],
+)
+def test_compiled_dump(meta):
+    class UserSchema(ModelSchema[User]):
+        Meta = type("Meta", (), {"model": User, **meta})
+
+    role = Role.create(name="admin")
+    users = [
+        User.create(name="Mike", role=role, rating=3),
+        User(name="Bob", title=None, active=False),
+        User(id=10, name=b"Denis", rating="42", active="false", role=role),
+    ]
+
+    schema = UserSchema()
+    compiled_schema = compiled(UserSchema)()
+    assert compiled_schema._dump_sources
+    assert compiled_schema.dump(users, many=True) == schema.dump(users, many=True)
+    assert compiled_schema.dump(users[0]) == schema.dump(users[0])
+
+
+def test_compiled_dump_types():
+    class ItemSchema(ModelSchema[Item]):
+        class Meta:
+            model = Item
+
+    item = Item(id=1, weight=1, user=User(id=2))
+    assert compiled(ItemSchema)().dump(item) == ItemSchema().dump(item)
+
+    item = Item(weight=None, user=None, price=None)
+    assert compiled(ItemSchema)().dump(item) == ItemSchema().dump(item)
+
+
+def test_compiled_dump_fallback():
+    class UserSchema(ModelSchema[User]):
+        created = ma.fields.DateTime("timestamp_ms")
+        title = ma.fields.Method("get_title")
+        user_role = FKNested(Role, attribute="role")
+
+        class Meta:
+            model = User
+            exclude = ("role",)
+            compiled_dump = True
+
+        def get_title(self, obj):
+            return obj.name.upper()
+
+    sources = set(UserSchema._dump_sources)
+    assert sources == {"id", "created", "name", "active", "rating", "role"}
+
+    role = Role.create(name="admin")
+    user = User.create(name="Mike", role=role)
+    user = User.select(User, Role).join(Role).get()
+
+    data = UserSchema().dump(user)
+    assert data["title"] == "MIKE"
+    assert data["user_role"] == {"id": str(role.id), "name": "admin"}
+    assert data["created"] == ma.fields.DateTime("timestamp_ms").serialize(
+        "created", user
+    )
+
+    # Not a model instance
+    assert UserSchema(only=("name",)).dump({"name": "Bob"}) == {"name": "Bob"}
+
+
+@pytest.mark.parametrize("meta", [{}, {"string_keys": False}, {"id_keys": True}])
+def test_dump_rows(meta):
+    class UserSchema(ModelSchema[User]):
+        Meta = type("Meta", (), {"model": User, **meta})
+
+    role = Role.create(name="admin")
+    User.create(name="Mike", role=role, rating=3)
+    User.create(name="Bob", role=role, title="Mr")
+
+    schema = UserSchema()
+    query = User.select().order_by(User.id)
+    expected = schema.dump(query, many=True)
+
+    assert schema.dump_rows(query) == expected
+    assert schema.dump_rows(query.dicts()) == expected
+    assert schema.dump_rows(list(query.dicts())) == expected
+    assert schema.dump_rows(list(query.tuples())) == expected
+    assert list(schema.dump_iter(query)) == expected
+
+    query = User.select(User.name, User.id).order_by(User.id)
+    assert schema.dump_rows(query) == schema.dump(query, many=True)
+    assert schema.dump_rows(query.tuples(), columns=("name", "id")) == schema.dump(
+        query, many=True
+    )
+
+    with pytest.raises(ValueError, match="select only"):
+        schema.dump_rows(User.select(User, Role).join(Role))
+
+
+def test_dump_rows_fallback():
+    class UserSchema(ModelSchema[User]):
+        title = ma.fields.Method("get_title")
+
+        class Meta:
+            model = User
+
+        def get_title(self, obj):
+            return obj.name.upper()
+
+    role = Role.create(name="admin")
+    User.create(name="Mike", role=role)
+
+    schema = UserSchema()
+    expected = schema.dump(User.select(), many=True)
+    assert expected[0]["title"] == "MIKE"
+    assert schema.dump_rows(User.select()) == expected
+    assert list(schema.dump_iter(User.select())) == expected
+
+
+def test_select(db):
+    from marshmallow_peewee import Related
+
+    class UserSchema(ModelSchema[User]):
+        class Meta:
+            model = User
+            fields = ("id", "name", "role")
+            id_keys = True
+
+    role = Role.create(name="admin")
+    User.create(name="Mike", role=role, title="Mr")
+
+    schema = UserSchema()
+    query = schema.select()
+    assert [field.name for field in query._returning] == ["id", "name", "role"]
+    assert schema.dump(query, many=True) == schema.dump(User.select(), many=True)
+
+    query = schema.select(User.select().where(User.name == "Mike"))
+    assert [field.name for field in query._returning] == ["id", "name", "role"]
+    assert query.count() == 1
+
+    class RoleSchema(ModelSchema[Role]):
+        class Meta:
+            model = Role
+            fields = ("name",)
+
+    for nested in (FKNested(RoleSchema), Related(RoleSchema)):
+
+        class UserSchema2(ModelSchema[User]):
+            role = nested
+
+            class Meta:
+                model = User
+                fields = ("name", "role")
+
+        schema2 = UserSchema2()
+        query = schema2.select()
+        sql, _ = query.sql()
+        assert "JOIN" in sql
+        assert '"title"' not in sql
+
+        user = query.get()
+        assert user.__rel__["role"].name == "admin"
+        assert schema2.dump(user) == {"name": "Mike", "role": {"name": "admin"}}
+
+    class UserSchema3(ModelSchema[User]):
+        title = ma.fields.Method("get_title")
+
+        class Meta:
+            model = User
+            fields = ("id", "title")
+
+        def get_title(self, obj):
+            return f"{obj.title} {obj.name}"
+
+    query = UserSchema3().select()
+    assert len(query._returning) == len(User._meta.sorted_fields)
+    assert UserSchema3().dump(query, many=True) == [{"id": "1", "title": "Mr Mike"}]
+
+
+@pytest.mark.parametrize("backend", ["json", "orjson"])
+def test_dump_json(db, backend):
+    import io
+    import json
+
+    from marshmallow_peewee import Related
+
+    class ItemSchema(ModelSchema[Item]):
+        class Meta:
+            model = Item
+
+    class UserSchema(ModelSchema[User]):
+        item_set = Related()
+
+        class Meta:
+            model = User
+
+    db.create_tables([Item])
+    role = Role.create(name="admin")
+    user = User.create(name="Mike", role=role)
+    Item.create(user=user, weight=1.5)
+    Item.create(user=None, price=decimal.Decimal("0.1"))
+
+    def expected(schema, obj, **kwargs):
+        return json.loads(json.dumps(schema.dump(obj, **kwargs), default=str))
+
+    for schema in (ItemSchema(), UserSchema(), UserSchema(only=("id", "created"))):
+        model: Any = schema.opts.model
+        rows = expected(schema, model.select().order_by(model.id), many=True)
+        query = model.select().order_by(model.id)
+        data = schema.dump_json(query, backend=backend)
+        assert isinstance(data, bytes)
+        assert json.loads(data) == rows
+
+        obj = model.get()
+        assert json.loads(schema.dump_json(obj, backend=backend)) == expected(
+            schema, obj
+        )
+
+        fp = io.BytesIO()
+        query = model.select().order_by(model.id)
+        assert schema.dump_jsonl(query, fp, chunk_size=1, backend=backend) == len(rows)
+        assert [json.loads(line) for line in fp.getvalue().splitlines()] == rows
+
+    with pytest.raises(ValueError, match="backend"):
+        ItemSchema().dump_json([], backend="unknown")
+
+
+@pytest.mark.parametrize("backend", ["json", "orjson"])
+def test_dump_json_aware(backend):
+    import json
+
+    class Event(pw.Model):
+        at = pw.DateTimeField()
+        time = pw.TimeField()
+
+    class EventSchema(ModelSchema[Event]):
+        counts = ma.fields.Dict()
+
+        class Meta:
+            model = Event
+
+    tz = dt.timezone(dt.timedelta(hours=3))
+    event = Event(
+        id=1,
+        at=dt.datetime(2020, 1, 2, 1, 2, 3, tzinfo=tz),
+        time=dt.time(1, 2, 3, tzinfo=tz),
+    )
+    event.counts = {1: 2}  # type: ignore[attr-defined]
+
+    schema = EventSchema()
+    data = schema.dump(event)
+    assert data["time"] == "01:02:03+03:00"
+    assert (
+        schema.dump_json(event, backend=backend)
+        == json.dumps(data, separators=(",", ":")).encode()
+    )
+    assert (
+        schema.dump_json([event], many=True, backend=backend)
+        == json.dumps([data], separators=(",", ":")).encode()
+    )
+
+
+@pytest.mark.parametrize("arrays", [False, True])
+def test_dump_columns(arrays):
+    from array import array
+
+    class UserSchema(ModelSchema[User]):
+        class Meta:
+            model = User
+
+    class MethodSchema(UserSchema):
+        title = ma.fields.Method("get_title")
+
+        def get_title(self, obj):
+            return obj.name.upper()
+
+    role = Role.create(name="admin")
+    User.create(name="Mike", role=role, rating=3)
+    User.create(name="Bob", role=role, title="Mr", active=False)
+
+    for schema_cls in (UserSchema, MethodSchema):
+        schema = schema_cls()
+        expected = schema.dump(User.select().order_by(User.id), many=True)
+        result = schema.dump_columns(
+            User.select().order_by(User.id), arrays=arrays, chunk_size=1
+        )
+        assert list(result) == list(expected[0])
+        assert {key: list(values) for key, values in result.items()} == {
+            key: [item[key] for item in expected] for key in expected[0]
+        }
+        assert isinstance(result["rating"], array) is arrays
+        assert isinstance(result["active"], array) is arrays
+        assert isinstance(result["id"], list)  # string keys
+
+    # Not selected fields are nulls, arrays fall back to lists
+    result = UserSchema().dump_columns(
+        User.select(User.id, User.name).order_by(User.id), arrays=True
+    )
+    assert result["name"] == ["Mike", "Bob"]
+    assert result["rating"] == [None, None]
+
+    result = UserSchema().dump_columns(
+        [(1, "Mike", None), (2, "Bob", 5)],
+        columns=("id", "name", "rating"),
+        arrays=True,
+    )
+    assert result["id"] == ["1", "2"]
+    assert result["rating"] == [None, 5]
+
+    assert UserSchema().dump_columns(User.select().where(User.id < 0)) == {
+        key: [] for key in UserSchema().dump_fields
+    }
+
+    with pytest.raises(ValueError, match="select only"):
+        UserSchema().dump_columns(User.select(User, Role).join(Role))